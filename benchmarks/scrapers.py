@@ -0,0 +1,232 @@
+"""
+Offline benchmarks for the scraper parsers.
+
+    python -m benchmarks.scrapers record                  # downloads the fixtures (needs network)
+    python -m benchmarks.scrapers synthesize              # writes generated stand-ins for the fixtures instead
+    python -m benchmarks.scrapers run                     # benchmarks every recorded fixture
+    python -m benchmarks.scrapers run --save-baseline     # stores the results as this machine's baseline
+    python -m benchmarks.scrapers run --check             # exits with 1 on a regression against the baseline
+
+Fixtures are stored as raw HTML in benchmarks/fixtures, next to a manifest
+recording the page's URL and the parser that handles it. The committed fixtures
+are the synthetic ones, see benchmarks/synthetic.py.
+
+Timings only compare on the machine they were taken on, so the baseline is not
+committed: save one on a known good tree, then --check changes against it.
+
+Memory is measured with tracemalloc, so it covers the Python objects a parser
+allocates but not the trees libxml2 builds in its own heap.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+from urllib.parse import quote
+import importlib
+import statistics
+import argparse
+import asyncio
+import tracemalloc
+import json
+import time
+import gc
+import os
+import sys
+
+import aiohttp
+from tabulate import tabulate
+
+ROOT = os.path.dirname(__file__)
+FIXTURES = os.path.join(ROOT, 'fixtures')
+MANIFEST = os.path.join(FIXTURES, 'manifest.json')
+BASELINE = os.path.join(ROOT, 'baseline.json')
+
+FB_URL = 'https://fishbase.se'
+LA_URL = 'https://aquarium-fish.liveaquaria.com/api/Search/'
+
+# name: (parser, method, url, form data)
+PAGES: dict[str, tuple[str, str, str, Optional[dict[str, str]]]] = {
+    'fb_species_betta': ('bot.ext.fishbase:parse_species_html', 'GET', FB_URL + '/summary/Betta-splendens.html', None),
+    'fb_species_clownfish': ('bot.ext.fishbase:parse_species_html', 'GET', FB_URL + '/summary/Amphiprion-ocellaris.html', None),
+    'fb_results_betta': ('bot.ext.fishbase:parse_result_html', 'POST', FB_URL + '/ComNames/CommonNameSearchList.php', {'CommonName': 'betta'}),
+    'fb_results_goby': ('bot.ext.fishbase:parse_result_html', 'POST', FB_URL + '/ComNames/CommonNameSearchList.php', {'CommonName': 'goby'}),
+    'fb_results_sci_poecilia': ('bot.ext.fishbase:parse_result_html', 'POST', FB_URL + '/Nomenclature/ScientificNameSearchList.php?', {'gs': 'poecilia'}),
+    'la_results_clownfish': ('bot.ext.live_aquaria:parse_results_html', 'GET', LA_URL + quote('clownfish'), None),
+    'la_results_coral': ('bot.ext.live_aquaria:parse_results_html', 'GET', LA_URL + quote('coral'), None),
+}
+
+def load_parser(path: str) -> Callable[..., Any]:
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+def parser_args(fixture: dict[str, Any], html: str) -> tuple[Any, ...]:
+    # the fishbase parsers also need the page URL to resolve relative links
+    if fixture['parser'].startswith('bot.ext.fishbase:'):
+        return fixture['url'], html
+    return html,
+
+def synthesize() -> None:
+    from .synthetic import generate
+
+    os.makedirs(FIXTURES, exist_ok=True)
+    manifest = {}
+
+    for name, (fixture, html) in generate().items():
+        with open(os.path.join(FIXTURES, name + '.html'), 'w', encoding='utf-8') as file:
+            file.write(html)
+
+        manifest[name] = fixture
+        print(f'wrote {name} ({len(html)} chars)')
+
+    with open(MANIFEST, 'w') as file:
+        json.dump(manifest, file, indent=4)
+
+async def record() -> None:
+    os.makedirs(FIXTURES, exist_ok=True)
+    manifest = {}
+
+    async with aiohttp.ClientSession() as session:
+        for name, (parser, method, url, data) in PAGES.items():
+            async with session.request(method, url, data=data) as response:
+                response.raise_for_status()
+                html = await response.text(encoding='utf-8')
+
+            with open(os.path.join(FIXTURES, name + '.html'), 'w', encoding='utf-8') as file:
+                file.write(html)
+
+            manifest[name] = {'parser': parser, 'url': url}
+            print(f'recorded {name} ({len(html)} chars)')
+
+        # product pages have no stable URL, so the first clownfish result is recorded instead
+        products = load_parser('bot.ext.live_aquaria:parse_results_html')(
+            open(os.path.join(FIXTURES, 'la_results_clownfish.html'), encoding='utf-8').read(),
+            limit=1,
+        )
+        if products:
+            url = products[0]['url']
+            async with session.get(url) as response:
+                response.raise_for_status()
+                html = await response.text(encoding='utf-8')
+
+            with open(os.path.join(FIXTURES, 'la_product.html'), 'w', encoding='utf-8') as file:
+                file.write(html)
+
+            manifest['la_product'] = {'parser': 'bot.ext.live_aquaria:parse_product_html', 'url': url}
+            print(f'recorded la_product ({len(html)} chars)')
+
+    with open(MANIFEST, 'w') as file:
+        json.dump(manifest, file, indent=4)
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, round(q * (len(samples) - 1)))]
+
+def measure(func: Callable[..., Any], args: tuple[Any, ...], *, rounds: int, warmup: int = 3) -> dict[str, float]:
+    for _ in range(warmup):
+        func(*args)
+
+    samples = []
+    gc.collect()
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        func(*args)
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+
+    # peak: the most memory held at any point of one parse, result: what the returned value keeps alive
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        result = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        'min_ms': min(samples),
+        'p50_ms': statistics.median(samples),
+        'p90_ms': percentile(samples, 0.9),
+        'p99_ms': percentile(samples, 0.99),
+        'peak_kib': (peak - base) / 1024,
+        'result_kib': (current - base) / 1024,
+    }
+
+def run(*, rounds: int, only: Optional[list[str]] = None) -> dict[str, dict[str, float]]:
+    with open(MANIFEST) as file:
+        manifest = json.load(file)
+
+    results = {}
+    for name, fixture in manifest.items():
+        if only and name not in only:
+            continue
+
+        with open(os.path.join(FIXTURES, name + '.html'), encoding='utf-8') as file:
+            html = file.read()
+
+        results[name] = measure(load_parser(fixture['parser']), parser_args(fixture, html), rounds=rounds)
+    return results
+
+def check(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for metric in ('p50_ms', 'p90_ms', 'peak_kib'):
+            limit = baseline[name][metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(f'{name}: {metric} {result[metric]:.2f} > {limit:.2f} (baseline {baseline[name][metric]:.2f})')
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='benchmarks the scraper parsers against recorded pages')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('record', help='download the fixtures')
+    commands.add_parser('synthesize', help='write generated fixtures, for when the sites are out of reach')
+
+    run_parser = commands.add_parser('run', help='benchmark the parsers against the fixtures')
+    run_parser.add_argument('fixtures', nargs='*', help='only run these fixtures')
+    run_parser.add_argument('--rounds', type=int, default=50)
+    run_parser.add_argument('--save-baseline', action='store_true')
+    run_parser.add_argument('--check', action='store_true', help='compare against the stored baseline')
+    run_parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before --check fails')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        asyncio.run(record())
+        return 0
+    if args.command == 'synthesize':
+        synthesize()
+        return 0
+
+    results = run(rounds=args.rounds, only=args.fixtures)
+    print(tabulate(
+        [[name, *result.values()] for name, result in results.items()],
+        headers=['fixture', *next(iter(results.values()), {}).keys()],
+        floatfmt='.2f',
+    ))
+
+    if args.save_baseline:
+        with open(BASELINE, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'\nsaved baseline to {BASELINE}')
+
+    if args.check:
+        if not os.path.exists(BASELINE):
+            print(f'\nno baseline at {BASELINE}, save one from a known good tree with --save-baseline first')
+            return 2
+
+        with open(BASELINE) as file:
+            regressions = check(results, json.load(file), args.tolerance)
+
+        if regressions:
+            print('\nregressions:\n' + '\n'.join(regressions))
+            return 1
+        print('\nno regressions')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
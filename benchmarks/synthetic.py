@@ -0,0 +1,199 @@
+"""
+Synthetic stand-ins for the recorded fixtures, for machines that can't reach the live sites.
+
+    python -m benchmarks.scrapers synthesize
+
+Every page follows the markup the parsers select on, wrapped in the navigation, scripts and
+tables of boilerplate the real pages carry, and is generated from a fixed seed so the files
+are the same on every run. The result pages are deliberately large: the goby and coral
+searches have thousands of rows.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+from html import escape
+import random
+import json
+
+FB_URL = 'https://fishbase.se'
+LA_URL = 'https://www.liveaquaria.com'
+
+SEED = 1729
+
+WORDS = (
+    'reef', 'stream', 'benthic', 'pelagic', 'shallow', 'lagoon', 'estuary', 'coastal', 'tropical', 'juvenile',
+    'adult', 'spawning', 'female', 'male', 'dorsal', 'anal', 'caudal', 'fin', 'rays', 'spines', 'scales',
+    'body', 'depth', 'length', 'maximum', 'recorded', 'feeds', 'on', 'small', 'crustaceans', 'algae', 'in',
+    'the', 'of', 'and', 'with', 'a', 'to', 'found', 'near', 'rocky', 'sandy', 'bottoms', 'vegetation',
+)
+GENERA = (
+    'Betta', 'Amphiprion', 'Gobius', 'Poecilia', 'Trimma', 'Eviota', 'Valenciennea', 'Cryptocentrus',
+    'Acropora', 'Montipora', 'Euphyllia', 'Zoanthus', 'Sarcophyton', 'Discosoma', 'Ricordea', 'Goniopora',
+)
+LANGUAGES = ('English', 'German', 'French', 'Spanish', 'Japanese', 'Thai', 'Malay', 'Portuguese', 'Dutch', 'Danish')
+COUNTRIES = ('USA', 'UK', 'Germany', 'France', 'Spain', 'Japan', 'Thailand', 'Malaysia', 'Brazil', 'Netherlands')
+TYPES = ('Vernacular', 'Trade name', 'Accepted name', 'Synonym')
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def _species(rng: random.Random, genus: str) -> str:
+    return f"{genus} {''.join(rng.choice('aeioulmnrstc') for _ in range(rng.randint(5, 10)))}"
+
+def _page(title: str, body: str, *, head: str = '') -> str:
+    nav = ''.join(f'<li><a href="/menu/{i}.php">{escape(word.title())}</a></li>' for i, word in enumerate(WORDS))
+    script = '<script type="text/javascript">' + 'var _t = [];' * 400 + '</script>'
+    return (
+        '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+        f'<title>{escape(title)}</title>{head}'
+        '<link rel="stylesheet" href="/css/main.css">' + script +
+        f'</head><body><div id="header"><ul class="nav">{nav}</ul></div>{body}'
+        f'<div id="footer"><ul class="nav">{nav}</ul></div></body></html>\n'
+    )
+
+def fb_species(rng: random.Random, genus: str, epithet: str, common: str) -> str:
+    def section(text: str) -> str:
+        return f'<div class="smallSpace">{text}</div>'
+
+    refs = lambda: ', '.join(str(rng.randint(1, 99999)) for _ in range(rng.randint(1, 4)))
+    body = (
+        '<div id="ss-container">'
+        '<div id="ss-sciname">'
+        f'<span class="sciname"><a href="/summary/{genus}-{epithet}.html"><i>{genus}</i></a></span> '
+        f'<span class="sciname"><a href="/summary/{genus}-{epithet}.html"><i>{epithet}</i></a></span> '
+        '<span class="sheader6 noLinkDesign"><a href="/references/1">Regan</a></span>, '
+        '<span class="sheader6 noLinkDesign"><a href="/references/2">1910</a></span>'
+        f'<span class="sheader2"> {escape(common)} </span>'
+        '</div>'
+        '<div id="ss-photomap-container">'
+        f'<div id="ss-photo"><a href="/photos/{genus}"><img src="/images/species/{genus[:2]}{epithet[:2]}_u0.jpg"></a></div>'
+        f'<div id="ss-photo-full"><img src="/images/species/{genus[:2]}{epithet[:2]}_f0.jpg"></div>'
+        f'<div id="ss-map"><a href="/map"><img src="/images/maps/{genus}.png"></a></div>'
+        '</div>'
+        '<div id="ss-main">'
+        '<h1 class="slabel bottomBorder">Classification / Names</h1>'
+        + section('Actinopterygii <a href="/c">(ray-finned fishes)</a> &gt; Anabantiformes (Labyrinth fishes) &gt; Osphronemidae (Gouramies)')
+        + '<h1 class="slabel bottomBorder">Environment / Climate / Range</h1>'
+        + section(f' Freshwater; benthopelagic; pH range: 6.0 - 8.0 (Ref. {refs()}). {_sentence(rng, 12)}')
+        + '<h1 class="slabel bottomBorder">Distribution</h1>'
+        + section(' '.join(f'{_sentence(rng, 14)} (Ref. {refs()});' for _ in range(12)))
+        + '<h1 class="slabel bottomBorder">Size / Weight / Age</h1>'
+        + section(f'<span>Maturity?</span> 6.5&nbsp;cm (Ref. {refs()}) {_sentence(rng, 20)}')
+        + '<h1 class="slabel bottomBorder"> Short description </h1>'
+        + section(' '.join(_sentence(rng, 25) for _ in range(8)))
+        + '<h1 class="slabel bottomBorder">Biology</h1>'
+        + section(' '.join(f'{_sentence(rng, 20)} (Ref. {refs()})' for _ in range(10)))
+        + '<h1 class="slabel bottomBorder">IUCN Red List Status</h1>'
+        + '<span class=\'"black"\'>Vulnerable (VU) <a href="/iucn">(A2c)</a></span>'
+        + ''.join(
+            '<h1 class="slabel bottomBorder">More information</h1><table class="references">'
+            + ''.join(f'<tr><td><a href="/ref/{rng.randint(1, 99999)}">{_sentence(rng, 6)}</a></td><td>{rng.randint(1900, 2021)}</td></tr>' for _ in range(40))
+            + '</table>'
+            for _ in range(6)
+        )
+        + '</div></div>'
+    )
+    return _page(f'{genus} {epithet}, {common}', body)
+
+def fb_results(rng: random.Random, genera: tuple[str, ...], rows: int) -> str:
+    def row() -> str:
+        species = _species(rng, rng.choice(genera))
+        return (
+            f'<tr><td>{escape(_sentence(rng, 2)[:-1])}</td><td>{rng.choice(LANGUAGES)}</td><td>{rng.choice(COUNTRIES)}</td>'
+            f'<td> <i><a href="../summary/{species.replace(" ", "-")}.html">{species}</a></i></td>'
+            f'<td>{rng.choice(TYPES)}</td></tr>'
+        )
+
+    table = (
+        '<table class="commonTable"><thead><tr><th>Common Name</th><th>Language</th><th>Country</th>'
+        '<th>Species</th><th>Type</th></tr></thead>'
+        + ''.join(row() for _ in range(rows))
+        + '</table>'
+    )
+    return _page('Common Names List', f'<div id="content">{table}</div>')
+
+def la_results(rng: random.Random, genera: tuple[str, ...], products: int) -> str:
+    def product(i: int) -> str:
+        name = _species(rng, rng.choice(genera))
+        return (
+            f'<div class="product col-sm-3" data-id="{i}">'
+            f'<a href="/product/{1000 + i}/?pcatid={rng.randint(1, 999)}">{escape(name)}</a>'
+            f'<div class="product_image"><a href="/product/{1000 + i}/"><img class="lazy image" src="https://cdn.liveaquaria.com/images/{i}.jpg" alt=""></a></div>'
+            '<div class="product_details">'
+            f'<h3 class="title">{escape(name)}</h3>'
+            f'<div class="rating" data-score="{rng.random() * 5:.1f}"></div>'
+            f'<div class="price">${rng.randint(5, 400)}.{rng.randint(0, 99):02}</div>'
+            f'<p class="summary">{_sentence(rng, 18)}</p>'
+            '</div></div>'
+        )
+
+    grid = '<div class="products row">' + ''.join(product(i) for i in range(products)) + '</div>'
+    return _page('Search Results', f'<div id="content">{grid}</div>')
+
+def la_product(rng: random.Random, name: str) -> str:
+    data = {
+        '@context': 'https://schema.org/',
+        '@type': 'Product',
+        'name': name,
+        'image': LA_URL,
+        'description': ' '.join(_sentence(rng, 20) for _ in range(12)),
+        'sku': '25789',
+        'offers': [
+            {'@type': 'Offer', 'price': f'{rng.randint(10, 99)}.99', 'priceCurrency': 'USD', 'name': size}
+            for size in ('Small', 'Medium', 'Large', 'Extra Large')
+        ],
+    }
+    head = f'<script type="application/ld+json">{json.dumps(data)}</script>'
+    body = (
+        '<div id="content"><div class="product-image main"><img src="/images/categories/product/p-25789-clownfish.jpg"></div>'
+        + ''.join(f'<div class="quick-stats"><p>{_sentence(rng, 16)}</p></div>' for _ in range(30))
+        + '</div>'
+    )
+    return _page(name, body, head=head)
+
+# name: (parser, url, page)
+PAGES: dict[str, tuple[str, str, Callable[[random.Random], str]]] = {
+    'fb_species_betta': (
+        'bot.ext.fishbase:parse_species_html', FB_URL + '/summary/Betta-splendens.html',
+        lambda rng: fb_species(rng, 'Betta', 'splendens', 'Siamese fighting fish'),
+    ),
+    'fb_species_clownfish': (
+        'bot.ext.fishbase:parse_species_html', FB_URL + '/summary/Amphiprion-ocellaris.html',
+        lambda rng: fb_species(rng, 'Amphiprion', 'ocellaris', 'Clown anemonefish'),
+    ),
+    'fb_results_betta': (
+        'bot.ext.fishbase:parse_result_html', FB_URL + '/ComNames/CommonNameSearchList.php',
+        lambda rng: fb_results(rng, ('Betta',), 150),
+    ),
+    'fb_results_goby': (
+        'bot.ext.fishbase:parse_result_html', FB_URL + '/ComNames/CommonNameSearchList.php',
+        lambda rng: fb_results(rng, ('Gobius', 'Trimma', 'Eviota', 'Valenciennea', 'Cryptocentrus'), 4000),
+    ),
+    'fb_results_sci_poecilia': (
+        'bot.ext.fishbase:parse_result_html', FB_URL + '/Nomenclature/ScientificNameSearchList.php?',
+        lambda rng: fb_results(rng, ('Poecilia',), 400),
+    ),
+    'la_results_clownfish': (
+        'bot.ext.live_aquaria:parse_results_html', LA_URL + '/api/Search/clownfish',
+        lambda rng: la_results(rng, ('Amphiprion',), 120),
+    ),
+    'la_results_coral': (
+        'bot.ext.live_aquaria:parse_results_html', LA_URL + '/api/Search/coral',
+        lambda rng: la_results(rng, ('Acropora', 'Montipora', 'Euphyllia', 'Zoanthus', 'Sarcophyton', 'Discosoma'), 2000),
+    ),
+    'la_product': (
+        'bot.ext.live_aquaria:parse_product_html', LA_URL + '/product/1000/',
+        lambda rng: la_product(rng, 'Ocellaris Clownfish'),
+    ),
+}
+
+def generate() -> dict[str, tuple[dict[str, str], str]]:
+    """every synthetic page by name, as its manifest entry and its HTML"""
+
+    pages = {}
+    for name, (parser, url, page) in PAGES.items():
+        # one generator per page, so changing one page leaves the others as they were
+        html = page(random.Random(f'{SEED}:{name}'))
+        pages[name] = {'parser': parser, 'url': url, 'synthetic': True}, html
+    return pages
@@ -1,4 +1,9 @@
-from typing import Any, Optional, ClassVar
+from typing import Any, Callable, Optional, ClassVar, TypeVar
+from concurrent.futures import Executor, ProcessPoolExecutor
+import multiprocessing
+import importlib
+import functools
+import asyncio
 import os
 import json
 
@@ -11,6 +16,21 @@ from aiohttp import ClientSession, MultipartWriter
 from requests_html import AsyncHTMLSession as HTMLSession
 
 from .context import AquaContext
+from .cache import FileCache, HTTPCache
+from .snapshots import SpeciesStore
+from .web import WebClient
+from .render import RenderEngine
+
+T = TypeVar('T')
+
+PARSER_MODULES: tuple[str] = (
+    'bot.ext.fishbase',
+    'bot.ext.live_aquaria',
+)
+
+def _init_parser(*modules: str) -> None:
+    for module in modules:
+        importlib.import_module(module)
 
 class AquaBot(commands.Bot):
     color: ClassVar[int] = 0x2F3136
@@ -37,8 +57,14 @@ class AquaBot(commands.Bot):
             **kwargs
         )
 
+        self.web: Optional[WebClient] = None
         self.session: Optional[ClientSession] = None
         self.HTMLSession: Optional[HTMLSession] = None
+        self.http_cache: Optional[HTTPCache] = None
+        self.species_store: Optional[SpeciesStore] = None
+        self.parse_executor: Optional[Executor] = None
+        self.renderer: Optional[RenderEngine] = None
+        self._render_warmup: Optional[asyncio.Task] = None
 
         self._token:  str = self.config['TOKEN']
         self._secret: str = self.config['SECRET']
@@ -70,13 +96,13 @@ class AquaBot(commands.Bot):
     async def load_all_cogs(self, *, jishaku: bool = True) -> None:
 
         if jishaku:
-            self.load_extension('jishaku')
+            await self.load_extension('jishaku')
 
         for ext in os.listdir('./bot/ext'):
             if not ext.endswith(".py"):
                 continue
 
-            self.load_extension('bot.ext.' + ext[:-3])
+            await self.load_extension('bot.ext.' + ext[:-3])
         return None
 
     async def on_connect(self) -> None:
@@ -86,17 +112,76 @@ class AquaBot(commands.Bot):
         self._logger.info('bot is ready')
 
     async def start(self, *args, **kwargs) -> None:
-        self.session = ClientSession()
+        self.web = WebClient(
+            rate_limits=self.config.get('RATE_LIMITS'),
+            retries=self.config.get('HTTP_RETRIES', 2),
+            timeout=self.config.get('HTTP_TIMEOUT', 20),
+        )
+        self.session = self.web.session
         self.HTMLSession = HTMLSession()
+        self.http_cache = HTTPCache(
+            self.config.get('HTTP_CACHE_PATH', 'cache/http.sqlite3'),
+            max_age=self.config.get('HTTP_CACHE_MAX_AGE', 86400),
+            max_size=self.config.get('HTTP_CACHE_MAX_SIZE', 64 * 1024 * 1024),
+        )
+        self.species_store = SpeciesStore(self.config.get('SPECIES_STORE_PATH', 'data/species.sqlite3'))
+        self.renderer = RenderEngine(
+            self.config.get('RENDER_WORKERS', 2),
+            cache=FileCache(
+                self.config.get('RENDER_CACHE_PATH', 'cache/renders'),
+                max_size=self.config.get('RENDER_CACHE_MAX_SIZE', 128 * 1024 * 1024),
+                memory_size=self.config.get('RENDER_CACHE_MEMORY_SIZE', 16 * 1024 * 1024),
+                suffix='.png',
+            ),
+        )
+        # the render workers warm up in the background while the bot logs in
+        self._render_warmup = asyncio.create_task(self.start_render_workers())
+
+        if self.config.get('PARSE_BACKEND', 'thread') == 'process':
+            await self.start_parse_workers(self.config.get('PARSE_WORKERS') or os.cpu_count() or 1)
 
         await self.load_all_cogs()
         return await super().start(*args, **kwargs)
 
     async def close(self) -> None:
-        await self.session.close()
+        await self.web.close()
         await self.HTMLSession.close()
+        self.http_cache.close()
+        self.species_store.close()
+        self._render_warmup.cancel()
+        self.renderer.close()
+
+        if self.parse_executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
         return await super().close()
 
+    async def start_parse_workers(self, workers: int) -> None:
+        self.parse_executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_parser,
+            initargs=PARSER_MODULES,
+        )
+
+        # workers are spawned on demand, submitting one job per worker starts all of them up front
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self.parse_executor, os.getpid) for _ in range(workers)
+        ))
+        self._logger.info(f'started {workers} parse workers')
+
+    async def start_render_workers(self) -> None:
+        await self.renderer.start()
+        self._logger.info(f'started {self.renderer.workers} render workers')
+
+    async def run_parser(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        runs a scraper's parse function on the configured parse backend
+        with the process backend, `func` has to be a module level function taking and returning picklable data
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, functools.partial(func, *args, **kwargs))
+
     async def get_context(self, message: discord.Message, *, cls: type = AquaContext):
         return await super().get_context(message, cls=cls)
 
@@ -118,7 +203,7 @@ class AquaBot(commands.Bot):
 
         content.set_content_disposition("form-data", name='meta')
 
-        async with self.session.post(MYSTBIN_URL, data=payload) as r:
+        async with self.web.post(MYSTBIN_URL, data=payload) as r:
             if r.ok:
                 data = await r.json()
                 paste = 'https://mystb.in/' + data['pastes'][0]['id']
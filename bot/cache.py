@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+from collections import OrderedDict
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .web import WebClient
+
+__all__: tuple[str] = (
+    'CachedResponse',
+    'HTTPCache',
+    'SizedLRU',
+    'SWRCache',
+    'FileCache',
+)
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+class CachedResponse(NamedTuple):
+    status: int
+    text: str
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+class _Entry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+class HTTPCache:
+    """
+    A persistent cache of GET responses, stored in SQLite and keyed by URL.
+
+    Entries younger than `max_age` seconds are served without touching the network,
+    older ones are revalidated with a conditional GET (ETag / Last-Modified).
+    Once the stored bodies exceed `max_size` bytes the least recently used entries are evicted.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS responses (
+            url           TEXT PRIMARY KEY,
+            body          BLOB NOT NULL,
+            etag          TEXT,
+            last_modified TEXT,
+            fetched_at    REAL NOT NULL,
+            accessed_at   REAL NOT NULL,
+            size          INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+    '''
+
+    def __init__(self, path: str, *, max_age: float = 86400, max_size: int = 64 * 1024 * 1024) -> None:
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+
+        self.max_age = max_age
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(self.SCHEMA)
+
+    def _lookup(self, url: str) -> Optional[_Entry]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+
+            if row:
+                self._db.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+                return _Entry(*row)
+
+    def _refresh(self, url: str, fetched_at: float) -> None:
+        with self._lock:
+            self._db.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (fetched_at, url))
+
+    def _store(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float) -> None:
+        body = zlib.compress(text.encode('utf-8'))
+
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, fetched_at, fetched_at, len(body)),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        excess = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+
+        evicted = []
+        for url, size in self._db.execute('SELECT url, size FROM responses ORDER BY accessed_at'):
+            evicted.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        self._db.executemany('DELETE FROM responses WHERE url = ?', evicted)
+
+    async def get(self, client: WebClient, url: str, *, encoding: str = 'utf-8') -> CachedResponse:
+        entry = await asyncio.to_thread(self._lookup, url)
+        now = time.time()
+
+        if entry and now - entry.fetched_at < self.max_age:
+            return CachedResponse(200, zlib.decompress(entry.body).decode('utf-8'), True)
+
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        async with client.get(url, headers=headers) as response:
+            if entry and response.status == 304:
+                await asyncio.to_thread(self._refresh, url, now)
+                return CachedResponse(200, zlib.decompress(entry.body).decode('utf-8'), True)
+
+            if not response.ok:
+                return CachedResponse(response.status, '')
+
+            text = await response.text(encoding=encoding)
+
+            await asyncio.to_thread(
+                self._store, url, text,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                now,
+            )
+            return CachedResponse(response.status, text)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class SizedLRU(Generic[K, V]):
+    """
+    An in-memory LRU cache bounded by the total size of its values rather than their count.
+
+    `sizeof` measures a value when it is stored, and entries expire `ttl` seconds after being stored.
+    """
+
+    def __init__(self, max_size: int, *, ttl: Optional[float] = None, sizeof: Callable[[V], int] = len) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._entries: OrderedDict[K, tuple[V, int, float]] = OrderedDict()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return default
+
+        value, _, stored_at = entry
+        if self.ttl is not None and time.monotonic() - stored_at >= self.ttl:
+            self.pop(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self.pop(key)
+
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+
+        self._entries[key] = (value, size, time.monotonic())
+        self.size += size
+
+        while self.size > self.max_size:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def pop(self, key: K) -> Optional[V]:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.size -= entry[1]
+            return entry[0]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SWRCache(Generic[K, V]):
+    """
+    A stale-while-revalidate cache of coroutine results, holding up to `max_entries` entries.
+
+    Entries younger than `fresh_for` seconds are served as they are.
+    Entries younger than `expire_after` are served immediately while a background task reloads them,
+    and anything older blocks on a reload.
+    """
+
+    def __init__(self, *, fresh_for: float, expire_after: float, max_entries: int = 1024) -> None:
+        self.fresh_for = fresh_for
+        self.expire_after = expire_after
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._refreshing: dict[K, asyncio.Task] = {}
+
+    def _store(self, key: K, value: V) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _reload(self, key: K, loader: Callable[[], Awaitable[V]]) -> None:
+        try:
+            self._store(key, await loader())
+        except Exception:
+            # the stale entry keeps being served until it expires, at which point the error surfaces
+            pass
+        finally:
+            del self._refreshing[key]
+
+    async def get(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        if (entry := self._entries.get(key)) is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+
+            if age < self.expire_after:
+                self._entries.move_to_end(key)
+
+                if age >= self.fresh_for and key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._reload(key, loader))
+                return value
+
+        value = await loader()
+        self._store(key, value)
+        return value
+
+    def close(self) -> None:
+        for task in self._refreshing.values():
+            task.cancel()
+
+class FileCache:
+    """
+    A cache of binary blobs keyed by content hashes: a `SizedLRU` of `memory_size` bytes in front of a directory.
+
+    Once the files exceed `max_size` bytes the least recently used are deleted.
+    Reading a file touches its modification time, so recency carries over between runs.
+    """
+
+    def __init__(self, path: str, *, max_size: int = 128 * 1024 * 1024, memory_size: int = 16 * 1024 * 1024, suffix: str = '') -> None:
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.max_size = max_size
+        self.suffix = suffix
+        self.memory: SizedLRU[str, bytes] = SizedLRU(memory_size)
+
+        self.size: int = 0
+        self._lock = threading.Lock()
+        self._files: OrderedDict[str, int] = OrderedDict()
+
+        files = [entry for entry in os.scandir(path) if entry.is_file() and entry.name.endswith(suffix)]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            size = entry.stat().st_size
+            self._files[entry.name[:len(entry.name) - len(suffix)]] = size
+            self.size += size
+
+        with self._lock:
+            self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.path, key + self.suffix)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.size -= self._files.pop(key, 0)
+            return None
+
+        return data
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        temp = f'{path}.{threading.get_ident()}.tmp'
+
+        with open(temp, 'wb') as file:
+            file.write(data)
+        os.replace(temp, path)
+
+        with self._lock:
+            self.size += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_size and self._files:
+            key, size = self._files.popitem(last=False)
+            self.size -= size
+
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if (data := self.memory.get(key)) is not None:
+            return data
+
+        if (data := await asyncio.to_thread(self._read, key)) is not None:
+            self.memory.set(key, data)
+        return data
+
+    async def set(self, key: str, data: bytes) -> None:
+        self.memory.set(key, data)
+        await asyncio.to_thread(self._write, key, data)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **self.memory.stats(),
+            'files': len(self._files),
+            'disk_size': self.size,
+        }
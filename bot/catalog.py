@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+from collections import Counter, defaultdict
+import bisect
+import time
+import re
+
+__all__: tuple[str] = (
+    'tokenize',
+    'ProductCatalog',
+)
+
+Product = dict[str, str]
+
+TOKEN_PAT = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> list[str]:
+    """lowercased alphanumeric words, with a plural `s` stripped so `tangs` finds `tang`"""
+    return [
+        token[:-1] if len(token) > 3 and token.endswith('s') else token
+        for token in TOKEN_PAT.findall(text.lower())
+    ]
+
+class ProductCatalog:
+    """
+    An in-memory product catalog with an inverted index over product names.
+
+    A query matches the products whose names contain every query word,
+    either exactly or as a prefix of a longer word; exact matches rank first.
+    """
+
+    def __init__(self) -> None:
+        self.products: dict[str, Product] = {}
+
+        self._seen: dict[str, float] = {}
+        self._index: defaultdict[str, set[str]] = defaultdict(set)
+        self._vocabulary: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _unindex(self, url: str) -> None:
+        for token in tokenize(self.products[url]['name']):
+            urls = self._index[token]
+            urls.discard(url)
+
+            if not urls:
+                del self._index[token]
+                self._vocabulary = None
+
+    def add(self, product: Product, *, category: str) -> None:
+        url = product['url']
+        if url in self.products:
+            self._unindex(url)
+
+        self.products[url] = {**product, 'category': category}
+        self._seen[url] = time.monotonic()
+
+        for token in tokenize(product['name']):
+            if token not in self._index:
+                self._vocabulary = None
+            self._index[token].add(url)
+
+    def add_many(self, products: Iterable[Product], *, category: str) -> None:
+        for product in products:
+            self.add(product, category=category)
+
+    def prune(self, max_age: float) -> int:
+        """drops products that have not been crawled again in `max_age` seconds"""
+        cutoff = time.monotonic() - max_age
+        stale = [url for url, seen in self._seen.items() if seen < cutoff]
+
+        for url in stale:
+            self._unindex(url)
+            del self.products[url]
+            del self._seen[url]
+        return len(stale)
+
+    def _prefixed(self, prefix: str) -> list[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._index)
+
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, *, limit: Optional[int] = None) -> list[Product]:
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        scores: Counter[str] = Counter()
+        matched: Optional[set[str]] = None
+
+        for token in tokens:
+            hits: set[str] = set()
+            for word in self._prefixed(token):
+                urls = self._index[word]
+                hits |= urls
+
+                # an exact word match is worth more than a prefix match
+                for url in urls:
+                    scores[url] += 2 if word == token else 1
+
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                return []
+
+        ranked = sorted(
+            matched,
+            key=lambda url: (-scores[url], len(tokenize(self.products[url]['name'])), self.products[url]['name']),
+        )
+        return [self.products[url] for url in ranked[:limit]]
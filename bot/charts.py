@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+from io import BytesIO
+
+import numpy as np
+from matplotlib import font_manager, style
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from PIL import Image
+
+from .expression import compile_expression
+
+__all__: tuple[str] = (
+    'VIEWPORT',
+    'adaptive_sample',
+    'Chart',
+    'CHARTS',
+    'render_chart',
+    'warm_up',
+)
+
+VIEWPORT = (-40, 40)
+BASE_STYLE = ('fast', 'fivethirtyeight', 'ggplot')
+
+def adaptive_sample(fn, lo: float, hi: float, *, points: int = 512, depth: int = 6, tolerance: float = 1e-3):
+    """
+    samples the vectorized `fn` over [lo, hi]
+    starts from an even grid and keeps bisecting the intervals where the curve bends away from a straight line,
+    so points end up concentrated where the curvature is
+    """
+
+    x = np.linspace(lo, hi, points)
+    y = fn(x)
+    threshold = tolerance * (hi - lo)
+
+    for _ in range(depth):
+        mid = (x[:-1] + x[1:]) / 2
+        y_mid = fn(mid)
+
+        # how far the curve strays from the chord between neighbouring points; non finite values are refined too
+        refine = ~(np.abs(y_mid - (y[:-1] + y[1:]) / 2) <= threshold)
+        if not refine.any():
+            break
+
+        idx = np.flatnonzero(refine) + 1
+        x = np.insert(x, idx, mid[refine])
+        y = np.insert(y, idx, y_mid[refine])
+
+    return x, y
+
+def draw_bar(ax: Axes, labels: Sequence[str], values: Sequence[float]) -> None:
+    ax.bar(labels, values)
+
+def draw_pie(ax: Axes, labels: Sequence[str], values: Sequence[float]) -> None:
+    ax.pie(values, labels=labels, autopct='%1.1f%%', shadow=True)
+
+def draw_scatter(ax: Axes, x: Sequence[Any], values: Sequence[float]) -> None:
+    ax.scatter(x, values, color='r')
+
+def draw_line(ax: Axes, x: Sequence[Any], values: Sequence[float]) -> None:
+    ax.plot(x, values, 'o-g')
+
+def draw_exponent(ax: Axes, values: Sequence[float]) -> None:
+    x = np.asarray(values, dtype=float)
+    ax.plot(x, np.exp(x))
+
+class Curve(NamedTuple):
+    x: np.ndarray
+    y: np.ndarray
+    xlim: tuple[float, float] = VIEWPORT
+    ylim: tuple[float, float] = VIEWPORT
+
+def sample_linear(m: float, b: float) -> Curve:
+    return Curve(*adaptive_sample(lambda x: m * x + b, *VIEWPORT))
+
+def sample_quadratic(a: float, b: float, c: float) -> Curve:
+    return Curve(*adaptive_sample(lambda x: a * x**2 + b * x + c, *VIEWPORT))
+
+def sample_equation(expression: str, xlim: tuple[float, float] = VIEWPORT, ylim: tuple[float, float] = VIEWPORT) -> Curve:
+    """samples the expression over the window only, so panning and zooming never evaluate what is out of view"""
+    return Curve(*adaptive_sample(compile_expression(expression), *xlim), tuple(xlim), tuple(ylim))
+
+def draw_linear_solution(ax: Axes, m: float, b: float, x: float, y: float) -> None:
+    lim = abs(x) * 3
+    x_ = np.linspace(-lim, lim, 100)
+    y_ = m * x_ + b
+
+    ax.spines['left'].set_position('center')
+    ax.spines['bottom'].set_position('zero')
+    ax.spines['right'].set_color('none')
+    ax.spines['top'].set_color('none')
+    ax.xaxis.set_ticks_position('bottom')
+    ax.yaxis.set_ticks_position('left')
+
+    ax.plot(x, y, 'r')
+    ax.plot(x_, y_)
+    ax.plot(x, y, marker='o')
+
+class Chart(NamedTuple):
+    """
+    a chart type: either `draw` draws it onto a fresh Axes,
+    or `sample` returns a single curve and its window, plotted on a reusable template
+    """
+
+    styles: tuple[str, ...]
+    draw: Optional[Callable[..., Any]] = None
+    sample: Optional[Callable[..., Curve]] = None
+    transparent: bool = False
+
+CHARTS: dict[str, Chart] = {
+    'bar': Chart(BASE_STYLE, draw=draw_bar),
+    'pie': Chart((*BASE_STYLE, 'Solarize_Light2'), draw=draw_pie, transparent=True),
+    'scatter': Chart((*BASE_STYLE, 'bmh'), draw=draw_scatter),
+    'line': Chart((*BASE_STYLE, 'bmh'), draw=draw_line),
+    'exponent': Chart((*BASE_STYLE, 'bmh'), draw=draw_exponent),
+    'linear': Chart((*BASE_STYLE, 'bmh'), sample=sample_linear),
+    'quadratic': Chart((*BASE_STYLE, 'bmh'), sample=sample_quadratic),
+    'equation': Chart((*BASE_STYLE, 'bmh'), sample=sample_equation),
+    'linear_solution': Chart((*BASE_STYLE, 'bmh'), draw=draw_linear_solution),
+}
+
+class _Template(NamedTuple):
+    canvas: FigureCanvasAgg
+    ax: Axes
+    line: Line2D
+
+# one per chart type, renders run one at a time in each of the render engine's worker processes
+_templates: dict[str, _Template] = {}
+
+def _new_template() -> _Template:
+    """a styled figure with one empty line, for the current style"""
+
+    canvas = FigureCanvasAgg(Figure())
+    ax = canvas.figure.add_subplot()
+
+    line, = ax.plot([], [])
+    return _Template(canvas, ax, line)
+
+def _draw_figure(chart: Chart, *args: Any) -> FigureCanvasAgg:
+    canvas = FigureCanvasAgg(Figure())
+    ax = canvas.figure.add_subplot()
+
+    chart.draw(ax, *args)
+
+    if chart.transparent:
+        for patch in (canvas.figure.patch, ax.patch):
+            patch.set_facecolor('none')
+            patch.set_edgecolor('none')
+
+    return canvas
+
+def render_chart(name: str, *args: Any) -> bytes:
+    """
+    renders a registered chart to PNG bytes without touching pyplot
+
+    drawn charts get a figure of their own, sampled ones update the line of their chart type's template in place;
+    either way the figure is rasterized with the chart's style applied on top of the defaults
+    """
+
+    chart = CHARTS[name]
+    curve = chart.sample(*args) if chart.sample else None
+
+    with style.context(chart.styles, after_reset=True):
+        if curve is None:
+            canvas = _draw_figure(chart, *args)
+        else:
+            if (template := _templates.get(name)) is None:
+                template = _templates[name] = _new_template()
+
+            template.ax.set_xlim(curve.xlim)
+            template.ax.set_ylim(curve.ylim)
+            template.line.set_data(curve.x, curve.y)
+            canvas = template.canvas
+
+        canvas.draw()
+        size = canvas.get_width_height()
+        pixels = bytes(canvas.buffer_rgba())
+
+    buffer = BytesIO()
+    Image.frombuffer('RGBA', size, pixels, 'raw', 'RGBA', 0, 1).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def warm_up() -> None:
+    """loads every chart's styles and the fonts they use and builds the templates, so the first real render is not the slow one"""
+
+    for chart in CHARTS.values():
+        with style.context(chart.styles, after_reset=True):
+            font_manager.findfont(font_manager.FontProperties())
+
+    render_chart('linear', 1, 0)
+    render_chart('quadratic', 1, 0, 0)
+    render_chart('equation', 'x')
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+__all__: tuple[str] = (
+    'InvalidDataset',
+    'SeriesReader',
+    'lttb',
+)
+
+# the default figure is 6.4in wide at 100 dpi, more points than this can't be told apart
+PIXEL_WIDTH = 640
+
+DELIMITERS = (',', '\t', ';')
+
+class InvalidDataset(Exception):
+    pass
+
+def _is_number(field: str) -> bool:
+    try:
+        float(field)
+    except ValueError:
+        return False
+    return True
+
+class SeriesReader:
+    """
+    Parses delimited numeric text (CSV, TSV or whitespace separated columns) into numpy arrays, fed in chunks.
+
+    A leading header row is skipped. The series' values are the last numeric column of the first data row,
+    and the numeric column before it, if there is one, holds their x values; otherwise the row number does.
+    Columns that aren't numbers, like timestamps, are ignored.
+    """
+
+    def __init__(self, *, max_rows: int = 5_000_000) -> None:
+        self.max_rows = max_rows
+        self.rows: int = 0
+
+        self._rest = b''
+        # only the start of the file can hold a byte order mark, which would otherwise stick to the first field
+        self._encoding = 'utf-8-sig'
+        self._delimiter: Optional[str] = None
+        self._columns: Optional[tuple[int, ...]] = None
+        self._blocks: list[np.ndarray] = []
+
+    def _detect(self, lines: list[str]) -> list[str]:
+        """picks the delimiter and columns from the first data row, returning the lines from that row on"""
+
+        for i, line in enumerate(lines):
+            if not (line := line.split('#', 1)[0].strip()):
+                continue
+
+            self._delimiter = next((delimiter for delimiter in DELIMITERS if delimiter in line), None)
+            numeric = [j for j, field in enumerate(line.split(self._delimiter)) if _is_number(field.strip())]
+
+            if numeric:
+                self._columns = tuple(numeric[-2:])
+                return lines[i:]
+
+        return []
+
+    def _parse(self, lines: list[str]) -> None:
+        if self._columns is None and not (lines := self._detect(lines)):
+            return
+
+        try:
+            block = np.loadtxt(lines, delimiter=self._delimiter, usecols=self._columns, ndmin=2, comments='#')
+        except ValueError:
+            raise InvalidDataset('Could not read that file, every row needs numbers in the same columns as the first') from None
+
+        self.rows += len(block)
+        if self.rows > self.max_rows:
+            raise InvalidDataset(f'That file has more than {self.max_rows:,} rows')
+
+        self._blocks.append(block)
+
+    def _decode(self, data: bytes) -> list[str]:
+        text = data.decode(self._encoding, 'replace')
+        self._encoding = 'utf-8'
+        return text.splitlines()
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._rest + chunk
+        end = data.rfind(b'\n') + 1
+
+        self._rest = data[end:]
+        if end:
+            self._parse(self._decode(data[:end]))
+
+    def close(self) -> tuple[np.ndarray, np.ndarray]:
+        """parses whatever is left and returns the (x, y) series, without rows holding NaN or infinite values"""
+
+        if self._rest:
+            self._parse(self._decode(self._rest))
+            self._rest = b''
+
+        if not self._blocks:
+            raise InvalidDataset('That file has no numeric data')
+
+        data = np.concatenate(self._blocks)
+        self._blocks.clear()
+
+        y = data[:, -1]
+        x = data[:, 0] if data.shape[1] > 1 else np.arange(len(y), dtype=float)
+
+        finite = np.isfinite(x) & np.isfinite(y)
+        return x[finite], y[finite]
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int = PIXEL_WIDTH) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling, returns the indices of the `threshold` points to keep
+
+    the first and last points are always kept, and from each bucket in between
+    the point forming the largest triangle with the previously kept point and the next bucket's average
+    """
+
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = kept[i + 1] = start + int(area.argmax())
+
+    return kept
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from typing import Callable
+import functools
+import ast
+import re
+
+import numpy as np
+
+__all__: tuple[str] = (
+    'InvalidExpression',
+    'normalize_expression',
+    'compile_expression',
+)
+
+class InvalidExpression(Exception):
+    pass
+
+FUNCTIONS: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+    'sinh': np.sinh,
+    'cosh': np.cosh,
+    'tanh': np.tanh,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'exp': np.exp,
+    'log': np.log,
+    'ln': np.log,
+    'log10': np.log10,
+    'log2': np.log2,
+    'floor': np.floor,
+    'ceil': np.ceil,
+    'sign': np.sign,
+}
+
+CONSTANTS: dict[str, float] = {
+    'pi': np.pi,
+    'e': np.e,
+}
+
+VARIABLE = 'x'
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+MAX_LENGTH = 256
+# the validator recurses about four frames per level of the syntax tree, this keeps it well clear of the recursion limit
+MAX_DEPTH = 128
+
+# a run of digits and dots, taken whole so `2.5.5` is one malformed number rather than `2.5` times `.5`;
+# `e` right after it and followed by digits is captured too, `e` is the constant and `2e2` would be ambiguous
+TOKEN_PAT = re.compile(r'([\d.]+(?:e\d+)?)|([a-z][a-z0-9]*)|(\*\*|[-+*/%(),])|(\S)')
+NUMBER_PAT = re.compile(r'\d+\.?\d*|\.\d+')
+# longest names first, so `exp` is not read as `e` followed by `xp`
+NAME_PAT = re.compile('|'.join(sorted((*FUNCTIONS, *CONSTANTS, VARIABLE), key=len, reverse=True)) + r'|\d+')
+
+def _tokenize(expression: str) -> list[str]:
+    tokens = []
+
+    for number, word, operator, other in TOKEN_PAT.findall(expression):
+        if other:
+            raise InvalidExpression(f'Unexpected character `{other}`')
+        elif word:
+            # names are written without separators (`2xsin(x)`), so split them into known names
+            position = 0
+            while position < len(word):
+                if not (match := NAME_PAT.match(word, position)):
+                    raise InvalidExpression(f'Unknown name `{word[position:]}`')
+                tokens.append(match.group())
+                position = match.end()
+        elif number:
+            if not NUMBER_PAT.fullmatch(number):
+                raise InvalidExpression(f'Malformed number `{number}`')
+            tokens.append(number)
+        else:
+            tokens.append(operator)
+
+    return tokens
+
+def _is_operand_end(token: str) -> bool:
+    return token == ')' or token == VARIABLE or token in CONSTANTS or token[0].isdigit() or token[0] == '.'
+
+def _is_operand_start(token: str) -> bool:
+    return token == '(' or token == VARIABLE or token in CONSTANTS or token in FUNCTIONS or token[0].isdigit() or token[0] == '.'
+
+def normalize_expression(expression: str) -> str:
+    """
+    rewrites the user's notation as a python expression:
+    `^` is a power and juxtaposition is multiplication, so `2x^2 + 3(x - 1)` becomes `2*x**2+3*(x-1)`
+    """
+
+    tokens = _tokenize(expression.lower().replace('^', '**'))
+
+    normalized = []
+    for prev, token in zip([None, *tokens], tokens):
+        if prev is not None and _is_operand_end(prev) and _is_operand_start(token):
+            normalized.append('*')
+        normalized.append(token)
+
+    return ''.join(normalized)
+
+class _Validator(ast.NodeTransformer):
+    """rejects anything outside the arithmetic whitelist, and turns integer literals into floats"""
+
+    def visit_Expression(self, node: ast.Expression) -> ast.AST:
+        return self.generic_visit(node)
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, BINARY_OPERATORS):
+            raise InvalidExpression('Unsupported operator')
+        return self.generic_visit(node)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, UNARY_OPERATORS):
+            raise InvalidExpression('Unsupported operator')
+        return self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise InvalidExpression('Unsupported literal')
+        # float arithmetic overflows to an error instead of building huge integers
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id != VARIABLE and node.id not in CONSTANTS:
+            raise InvalidExpression(f'Unknown name `{node.id}`')
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise InvalidExpression('Unknown function')
+        if node.keywords or len(node.args) != 1:
+            raise InvalidExpression(f'`{node.func.id}` takes exactly one argument')
+
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load, *BINARY_OPERATORS, *UNARY_OPERATORS)):
+            raise InvalidExpression('Unsupported syntax')
+        return super().generic_visit(node)
+
+def _depth(tree: ast.AST) -> int:
+    """the depth of a syntax tree, walked without recursing so any depth can be measured"""
+
+    depth = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in ast.iter_child_nodes(node))
+    return depth
+
+@functools.lru_cache(maxsize=256)
+def _compile(normalized: str) -> Callable[[np.ndarray], np.ndarray]:
+    try:
+        tree = ast.parse(normalized, mode='eval')
+        if _depth(tree) > MAX_DEPTH:
+            raise InvalidExpression('That expression is nested too deeply')
+
+        tree = ast.fix_missing_locations(_Validator().visit(tree))
+        code = compile(tree, '<expression>', 'eval')
+    except SyntaxError:
+        raise InvalidExpression('Invalid syntax') from None
+    except (RecursionError, MemoryError):
+        raise InvalidExpression('That expression is nested too deeply') from None
+
+    namespace = {'__builtins__': {}, **FUNCTIONS, **CONSTANTS}
+
+    def evaluate(x: np.ndarray) -> np.ndarray:
+        try:
+            with np.errstate(all='ignore'):
+                y = eval(code, namespace, {VARIABLE: x})
+
+            # a negative number to a fractional power of a float is complex, and converting it would drop the imaginary part
+            if np.iscomplexobj(y):
+                raise InvalidExpression('That expression has complex values')
+            y = np.asarray(y, dtype=float)
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise InvalidExpression(str(e)) from None
+
+        return np.broadcast_to(y, np.shape(x))
+
+    return evaluate
+
+def compile_expression(expression: str) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    compiles an expression in `x` into a function evaluating it over a whole numpy array at once
+    compiled functions are cached by their normalized text
+    """
+
+    if len(expression) > MAX_LENGTH:
+        raise InvalidExpression('That expression is too long')
+
+    return _compile(normalize_expression(expression))
@@ -1,23 +1,161 @@
-from typing import Union, Optional
+from typing import Any, Awaitable, Callable, ClassVar, Union, Optional
 from urllib.parse import urljoin
+import asyncio
+import json
+import os
 import re
 
 import discord
 from discord.ext import commands
 
-from bs4 import BeautifulSoup
-from bs4.element import Tag
-
 from tabulate import tabulate
 
 from numpy import array_split
 
 from ..bot import AquaBot
+from ..cache import SizedLRU
 from ..context import AquaContext
+from ..extract import *
 
 from ..utils import *
 
+FB_URL = 'https://fishbase.se'
+
+REFERENCE_PAT = re.compile(r'\(Ref\.? ?(([0-9]|,)+)\);?')
+SAVED_FROM_PAT = re.compile(r'<!-- saved from url=\(\d+\)(\S+?) -->')
+
+_CONTAINER = "(//div[@id='ss-container'])[1]"
+_NAMES = f"({_CONTAINER}//div[@id='ss-sciname'])[1]"
+_IMAGES = f"({_CONTAINER}//div[@id='ss-photomap-container'])[1]"
+_BODY = f"({_CONTAINER}//div[@id='ss-main'])[1]"
+
+SPECIES_PAGE = Extractor(
+    sci_name=f"{_NAMES}//span[{has_class('sciname')}]/node()[1]/node()[1]/node()[1]",
+    author=f"{_NAMES}//span[@class='sheader6 noLinkDesign']/node()[1]/node()[1]",
+    common_name=f"({_NAMES}//span[{has_class('sheader2')}])[1]/node()[1]",
+    photo=f"(({_IMAGES}//div[@id='ss-photo'])[1]//img)[1]/@src",
+    photo_full=f"(({_IMAGES}//div[@id='ss-photo-full'])[1]//img)[1]/@src",
+    map=f"(({_IMAGES}//div[@id='ss-map'])[1]//img)[1]/@src",
+    sections=f"{_BODY}//div[{has_class('smallSpace')}]",
+    headers=f"{_BODY}//h1[@class='slabel bottomBorder']",
+    conservation=f"({_BODY}//span[@class='\"black\"'])[1]//text()",
+)
+
+RESULTS_PAGE = Extractor(
+    rows='(//table)[1]//tr',
+    strings='//text()',
+    meta='(//meta)[1]/@content',
+)
+
+RESULT_ROW = Extractor(
+    cells='.//td',
+)
+
+RESULT_ITEM = Extractor(
+    link='(.//a)[1]',
+)
+
+def parse_species_html(url: str, html: str) -> dict[str, Any]:
+    page = SPECIES_PAGE(parse_html(html))
+
+    embed = discord.Embed(
+        description='',
+        url=url,
+        color=AquaBot.color
+    )
+
+    sci_name = ' '.join(page['sci_name']).title()
+    author_ref = ', '.join(page['author']).title()
+    cm_name = page['common_name'][0]
+
+    embed.title = f'{sci_name} | {author_ref}'
+    embed.description += f'*{cm_name.strip()}*\n\n'
+
+    if main_image := page['photo'] or page['photo_full']:
+        embed.set_image(url=urljoin(url, main_image[0]))
+
+    if map_image := page['map']:
+        embed.set_thumbnail(url=urljoin(url, map_image[0]))
+
+    contents = page['sections']
+
+    classification = ''.join(stripped_strings(contents[0])[:5])
+    embed.description += f'**Classification:**\n{classification}\n\n'
+
+    env = ''.join(stripped_strings(contents[1])[0].removesuffix('(Ref.'))
+    embed.description += f'**Environment:**\n{env}\n\n'
+
+    location = ''.join(strings(contents[2]))
+    location = REFERENCE_PAT.sub(' ', location)
+    embed.description += f'**Location:**\n{location.strip()}\n\n'
+
+    properties = ''.join(stripped_strings(contents[3]))
+    properties = properties.replace('&nbsp', ' ').replace('?', ' ')
+    properties = REFERENCE_PAT.sub(' ', properties)
+    embed.description += f'**Description:**\n{properties}\n\n\n'
+
+    headers = []
+    for header in page['headers']:
+        headers += stripped_strings(header)
+    has_desc = 'short description' in ''.join(headers).lower()
+
+    biology_idx = 5 if has_desc else 4
+
+    biology = ''.join(stripped_strings(contents[biology_idx]))
+    biology = REFERENCE_PAT.sub(' ', biology)
+    embed.add_field(name='\u200b', value=biology)
+
+    consv = page['conservation'][0]
+    embed.add_field(name='\u200b', value=f'**Conservation Status**\n{consv}', inline=False)
+
+    return {
+        'url': url,
+        'sci_name': sci_name,
+        'common_name': cm_name.strip(),
+        'embed': embed.to_dict(),
+    }
+
+def parse_saved_page(path: str) -> dict[str, Any]:
+    with open(path, encoding='utf-8') as file:
+        html = file.read()
+
+    if saved_from := SAVED_FROM_PAT.search(html):
+        url = saved_from.group(1)
+    else:
+        url = f'{FB_URL}/summary/{os.path.basename(path)}'
+
+    return parse_species_html(url, html)
+
+def _parse_item(base_url: str, item: Node) -> Union[str, tuple[str, str]]:
+    nodes = contents(item)
+    if len(nodes) == 1:
+        return nodes[0]
+    else:
+        hl = next(iter(RESULT_ITEM(nodes[1])['link']), nodes[1])
+        url = urljoin(base_url, hl.get('href'))
+        name = contents(hl)[0]
+        return name, url
+
+def parse_result_html(url: str, html: str) -> Union[str, list[dict[str, str]]]:
+    headers = ['common name', 'language', 'country', 'species', 'type']
+    page = RESULTS_PAGE(parse_html(html))
+    if data := page['rows']:
+        data = [
+            {key: _parse_item(url, item) for key, item in zip(headers, RESULT_ROW(result)['cells'])}
+            for result in data
+        ]
+        return data
+    elif page['strings'][0].lower() == 'please wait. searching...':
+        return urljoin(FB_URL, page['meta'][0].split("'")[1])
+    else:
+        return {'Message': 'No exact matches were found :('}
+
+def _embed_size(data: dict[str, Any]) -> int:
+    return len(json.dumps(data))
+
 class FBResultsSelect(discord.ui.Select):
+    inflight: ClassVar[SingleFlight] = SingleFlight()
+    embeds: ClassVar[SizedLRU[str, dict[str, Any]]] = SizedLRU(4 * 1024 * 1024, ttl=3600, sizeof=_embed_size)
 
     def __init__(self, bot: AquaBot, items: Optional[list[dict[str, Union[tuple[str, str], str]]]] = None) -> None:
 
@@ -40,131 +178,89 @@ class FBResultsSelect(discord.ui.Select):
             )
 
         self.bot = bot
-        self.reference_pat = re.compile(r'\(Ref\.? ?(([0-9]|,)+)\);?')
-
-    @to_thread
-    def parse_species_html(self, url: str, html: str) -> discord.Embed:
-        soup = BeautifulSoup(html, features='lxml')
-
-        embed = discord.Embed(
-            description='',
-            url=url,
-            color=self.bot.color
-        )
-
-        main_div = soup.find('div', id='ss-container')
-        name_div = main_div.find('div', id='ss-sciname')
-        sci_name = ' '.join(
-            word.contents[0].contents[0].contents[0]
-            for word in name_div.find_all('span', class_='sciname')
-        ).title()
-        author_ref = ', '.join(
-            word.contents[0].contents[0]
-            for word in name_div.find_all('span', class_='sheader6 noLinkDesign')
-        ).title()
-        cm_name = name_div.find('span', class_='sheader2').contents[0]
-
-        embed.title = f'{sci_name} | {author_ref}'
-        embed.description += f'*{cm_name.strip()}*\n\n'
+        self.prefetched: dict[str, asyncio.Task] = {}
+        self._cleanup: Optional[asyncio.Task] = None
 
-        images = main_div.find('div', id='ss-photomap-container')
-        main_image = images.find('div', id='ss-photo') or images.find('div', id='ss-photo-full')
+    async def parse_species_html(self, url: str, html: str) -> dict[str, Any]:
+        return await self.bot.run_parser(parse_species_html, url, html)
 
-        if main_image:
-            main_image = main_image.find('img')
-            main_image = urljoin(url, main_image.get('src'))
-            embed.set_image(url=main_image)
-
-        map_image = images.find('div', id='ss-map')
+    async def _fetch_species(self, url: str) -> dict[str, Any]:
+        response = await self.bot.http_cache.get(self.bot.web, url)
+        if response.ok:
+            return await self.parse_species_html(url, response.text)
+        else:
+            raise ApiError(f'{response.status}, Something went wrong while searching :(')
 
-        if map_image:
-            map_image = map_image.find('img')
-            map_image = urljoin(url, map_image.get('src'))
-            embed.set_thumbnail(url=map_image)
+    async def fetch_species(self, url: str) -> dict[str, Any]:
+        return await self.inflight.do(url, self._fetch_species, url)
 
-        body_div = main_div.find('div', id='ss-main')
-        contents = body_div.find_all('div', class_='smallSpace')
+    async def scrape_species(self, url: str) -> Optional[discord.Embed]:
+        if (data := self.embeds.get(url)) is None:
+            record = await self.bot.species_store.get(url) or await self.fetch_species(url)
+            data = record['embed']
+            self.embeds.set(url, data)
 
-        classification = ''.join(tuple(contents[0].stripped_strings)[:5])
-        embed.description += f'**Classification:**\n{classification}\n\n'
+        return discord.Embed.from_dict(data)
 
-        env = ''.join(tuple(contents[1].stripped_strings)[0].removesuffix('(Ref.'))
-        embed.description += f'**Environment:**\n{env}\n\n'
+    def prefetch(self, limit: int, *, concurrency: int = 3) -> None:
+        """
+        starts scraping the first `limit` species in the background, so selecting them is instant
+        the scrapes are cancelled and dropped once the view stops or times out, so the view needs a timeout
+        """
 
-        location = ''.join(tuple(contents[2].strings))
-        location = self.reference_pat.sub(' ', location)
-        embed.description += f'**Location:**\n{location.strip()}\n\n'
+        semaphore = asyncio.Semaphore(concurrency)
 
-        properties = ''.join(tuple(contents[3].stripped_strings))
-        properties = properties.replace('&nbsp', ' ').replace('?', ' ')
-        properties = self.reference_pat.sub(' ', properties)
-        embed.description += f'**Description:**\n{properties}\n\n\n'
+        async def scrape(url: str) -> discord.Embed:
+            async with semaphore:
+                return await self.scrape_species(url)
 
-        all_headers = body_div.find_all('h1', class_='slabel bottomBorder')
+        for item in self.items[:limit]:
+            url = item['species'][1]
+            if url not in self.prefetched:
+                self.prefetched[url] = asyncio.create_task(scrape(url))
 
-        headers = []
-        for header in all_headers:
-            headers += tuple(header.stripped_strings)
-        has_desc = 'short description' in ''.join(headers).lower()
+        if self._cleanup is None:
+            self._cleanup = asyncio.create_task(self._cancel_prefetch())
 
-        biology_idx = 5 if has_desc else 4
+    async def _cancel_prefetch(self) -> None:
+        await self.view.wait()
 
-        biology = ''.join(tuple(contents[biology_idx].stripped_strings))
-        biology = self.reference_pat.sub(' ', biology)
-        embed.add_field(name='\u200b', value=biology)
+        for task in self.prefetched.values():
+            task.cancel()
+        self.prefetched.clear()
 
-        consv = list(body_div.find('span', class_='"black"').strings)[0]
-        embed.add_field(name='\u200b', value=f'**Conservation Status**\n{consv}', inline=False)
+    async def get_species(self, url: str) -> discord.Embed:
+        task = self.prefetched.get(url)
 
-        return embed
+        if task is not None and not task.cancelled():
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # the prefetch was cancelled while it was awaited, which is only worth propagating if this call was too
+                if not task.cancelled():
+                    raise
+            except Exception:
+                pass
 
-    async def scrape_species(self, url: str) -> Optional[discord.Embed]:
-        async with self.bot.session.get(url) as response:
-            if response.ok:
-                html = await response.text(encoding='utf-8')
-                return await self.parse_species_html(url, html)
-            else:
-                raise ApiError(f'{response.status}, Something went wrong while searching :(')
+        return await self.scrape_species(url)
 
     async def callback(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer()
 
-        embed = await self.scrape_species(self.values[0].split()[-1])
+        embed = await self.get_species(self.values[0].split()[-1])
         return await interaction.followup.send(embed=embed, ephemeral=True)
 
 class FishBase(commands.Cog):
-    FB_URL = 'https://fishbase.se'
+    FB_URL: ClassVar[str] = FB_URL
 
     def __init__(self, bot: AquaBot) -> None:
         self.bot = bot
+        self.inflight = SingleFlight()
 
-    def _parse_item(self, base_url: str, item: Tag) -> Union[str, tuple[str, str]]:
-        contents = item.contents
-        if len(contents) == 1:
-            return contents[0]
-        else:
-            hl = contents[1].find('a') or contents[1]
-            url = urljoin(base_url, hl.get('href'))
-            name = hl.contents[0]
-            return name, url
-
-    @to_thread
-    def _parse_result_html(self, url: str, html: str) -> Union[str, list[dict[str, str]]]:
-        headers = ['common name', 'language', 'country', 'species', 'type']
-        soup = BeautifulSoup(html, features='lxml')
-        if data := soup.find('table'):
-            data = data.find_all('tr')
-            data = [
-                {key: self._parse_item(url, item) for key, item in zip(headers, result.find_all('td'))}
-                for result in data
-            ]
-            return data
-        elif tuple(soup.strings)[0].lower() == 'please wait. searching...':
-            return urljoin(self.FB_URL, soup.meta.get('content').split("'")[1])
-        else:
-            return {'Message': 'No exact matches were found :('}
+    async def _parse_result_html(self, url: str, html: str) -> Union[str, list[dict[str, str]]]:
+        return await self.bot.run_parser(parse_result_html, url, html)
 
-    async def scrape_fb(self, type_: str, query: str):
+    async def _scrape_fb(self, type_: str, query: str):
         payload = {type_: query}
         ENDPOINT = (
             '/ComNames/CommonNameSearchList.php' if type_ == 'CommonName' else
@@ -172,14 +268,41 @@ class FishBase(commands.Cog):
         )
 
         URL = self.FB_URL + ENDPOINT
-        async with self.bot.session.post(URL, data=payload) as response:
+        # the search is a read-only POST, so it is safe to retry
+        async with self.bot.web.post(URL, data=payload, retries=self.bot.web.retries) as response:
             if response.ok:
                 html = await response.text(encoding='utf-8')
                 return await self._parse_result_html(URL, html)
             else:
                 raise ApiError(f'{response.status}, Something went wrong while searching :(')
 
+    async def scrape_fb(self, type_: str, query: str):
+        return await self.inflight.do((type_, normalize(query)), self._scrape_fb, type_, query)
+
+    async def _parse_saved_page(self, path: str) -> dict[str, Any]:
+        return await self.bot.run_parser(parse_saved_page, path)
+
+    async def ingest_species(self, sources: list[str], loader: Callable[[str], Awaitable[dict[str, Any]]]) -> tuple[int, int]:
+        semaphore = asyncio.Semaphore(4)
+
+        async def load(source: str) -> dict[str, Any]:
+            async with semaphore:
+                return await loader(source)
+
+        results = await asyncio.gather(*map(load, sources), return_exceptions=True)
+        records = [result for result in results if not isinstance(result, Exception)]
+
+        stored = await self.bot.species_store.put_many(records)
+        return stored, len(results) - stored
+
     async def do_fishbase(self, ctx: AquaContext, query: str, type_: str) -> discord.Message:
+        if records := await self.bot.species_store.find(type_, query):
+            if len(records) == 1:
+                return await ctx.reply(embed=discord.Embed.from_dict(records[0]['embed']))
+
+            source = PageSource(lambda i: discord.Embed.from_dict(records[i]['embed']), total=len(records))
+            return await Paginator(ctx, source).start(reply=True)
+
         results = await self.scrape_fb(type_, query)
 
         if isinstance(results, dict):
@@ -188,16 +311,22 @@ class FishBase(commands.Cog):
             inst = await FBResultsSelect(self.bot).scrape_species(results)
             return await ctx.reply(embed=inst)
         else:
-            fm_results = [
-                f'**{num}.**\n\n' + '\n'.join([
-                    (f'**{h.title()}**: {r}' if isinstance(r, str) else f'**{h.title()}**: [{r[0]}]({r[1]})') for h, r in r.items()
-                ]) for num, r in enumerate(results[1:], 1)
-            ]
+            rows = results[1:]
+
+            # rows are only formatted once their page is shown
+            def format_row(index: int) -> discord.Embed:
+                desc = f'**{index + 1}.**\n\n' + '\n'.join([
+                    (f'**{h.title()}**: {r}' if isinstance(r, str) else f'**{h.title()}**: [{r[0]}]({r[1]})') for h, r in rows[index].items()
+                ])
+                return discord.Embed(description=desc, color=ctx.bot.color)
 
-            entries = [discord.Embed(description=desc, color=ctx.bot.color) for desc in fm_results]
+            # the view times out so the species prefetched for it are let go
+            paginator = Paginator(ctx, PageSource(format_row, total=len(rows)), timeout=self.bot.config.get('FB_RESULTS_TIMEOUT', 600))
+            select = FBResultsSelect(self.bot, results[1:])
+            paginator.view.add_item(select)
 
-            paginator = Paginator(ctx, entries)
-            paginator.view.add_item(FBResultsSelect(self.bot, results[1:]))
+            if limit := self.bot.config.get('FB_PREFETCH', 0):
+                select.prefetch(limit, concurrency=self.bot.config.get('FB_PREFETCH_CONCURRENCY', 3))
 
             return await paginator.start(reply=True)
 
@@ -213,5 +342,37 @@ class FishBase(commands.Cog):
     async def sci_name(self, ctx: AquaContext, *, query: str) -> discord.Message:
         return await self.do_fishbase(ctx, query, 'gs')
 
-def setup(bot):
-    bot.add_cog(FishBase(bot))
\ No newline at end of file
+    @fishbase_cmd.command(name='cachestats', hidden=True)
+    @commands.is_owner()
+    async def cache_stats(self, ctx: AquaContext) -> discord.Message:
+        stats = FBResultsSelect.embeds.stats()
+        return await ctx.reply(
+            f'**Species embed cache:** {stats["entries"]} entries, {stats["size"]} bytes, '
+            f'{stats["hits"]} hits, {stats["misses"]} misses'
+        )
+
+    @fishbase_cmd.command(name='ingest', hidden=True)
+    @commands.is_owner()
+    async def ingest(self, ctx: AquaContext, *, source: str) -> discord.Message:
+        """
+        bulk loads species pages into the local species store, which `fb` answers from first
+        `source` is either a directory of saved species pages or a file of species page URLs to crawl
+        """
+
+        if os.path.isdir(source):
+            paths = [
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.endswith(('.html', '.htm'))
+            ]
+            stored, failed = await self.ingest_species(paths, self._parse_saved_page)
+        elif os.path.isfile(source):
+            with open(source) as file:
+                urls = [line.strip() for line in file if line.strip()]
+            stored, failed = await self.ingest_species(urls, FBResultsSelect(self.bot).fetch_species)
+        else:
+            return await ctx.reply(f'`{source}` is neither a directory nor a file')
+
+        return await ctx.reply(f'Ingested {stored} species ({failed} failed), {len(self.bot.species_store)} stored in total')
+
+async def setup(bot):
+    await bot.add_cog(FishBase(bot))
\ No newline at end of file
@@ -102,5 +102,5 @@ class Games(commands.Cog):
         game = wordle.Wordle()
         await game.start(ctx)
 
-def setup(bot):
-    bot.add_cog(Games(bot))
\ No newline at end of file
+async def setup(bot):
+    await bot.add_cog(Games(bot))
\ No newline at end of file
@@ -1,159 +1,109 @@
+from __future__ import annotations
+
 import discord
 from discord.ext import commands
 import asyncio
-import re
-
-import matplotlib
-matplotlib.use("agg")
 
-from matplotlib import pyplot as plt
 import numpy as np
 
-from io import BytesIO
-from Equation import Expression
-
-from ..utils import to_thread
-
-@to_thread
-def data_check(data):
-    data = [a.isdigit() for a in data]
-    return all(data)
-
-@to_thread
-def bar(*args):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    buffer = BytesIO()
-    args1 = [int(i) for i in args]
-    plt.bar(args, args1)
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def pie(*args):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("Solarize_Light2")
-    buffer = BytesIO()
-    args1 = [int(i) for i in args]
-    plt.pie(args1, labels=args, autopct = '%1.1f%%', shadow = True)
-    plt.savefig(buffer, transparent=True)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def scatter(*args):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-    buffer = BytesIO()
-    args1 = [int(i) for i in args]
-    plt.scatter(args, args1, color='r')
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def line(*args):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-    buffer = BytesIO()
-
-    x_ = args
-    y = [int(i) for i in args]
-
-    plt.plot(x_, y, 'o-g')
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def linear(m: float, b: float):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-
-    plt.xlim((-40, 40))
-    plt.ylim((-40, 40))
-    buffer = BytesIO()
-
-    x_ = np.linspace(-100, 100, 50000)
-    y  = [(m * i + b) for i in x_]
-
-    plt.plot(x_, y)
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def quadratic(a: float, b: float, c: float):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-
-    plt.xlim((-40, 40))
-    plt.ylim((-40, 40))
-    buffer = BytesIO()
-
-    x_ = np.linspace(-100, 100, 50000)
-    y  = [(a * (i**2) + (b * i) + c) for i in x_]
-
-    plt.plot(x_, y)
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def equation_(equation: str):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-
-    def _mul(val):
-        val = list(val.group())
-        val.insert(-1, "*")
-        return "".join(val)
-
-    equation = equation.replace(' ', '')
-    equation = re.sub(r"(?<=[0-9x)])x", _mul, equation)
-    equation = equation.replace(")(", ")*(")
-
-    x = np.linspace(-100, 100, 50000)
-
-    fn = Expression(equation, ["x"])
-    y = [fn(i) for i in x]
-
-    plt.xlim((-40, 40))
-    plt.ylim((-40, 40))
-    buffer = BytesIO()
-
-    plt.plot(x, y)
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
-
-@to_thread
-def exponent(*args):
-    plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-    plt.style.use("bmh")
-    buffer = BytesIO()
-    x = np.array([int(i) for i in args])
-    y = np.exp(x)
-    plt.plot(x, y)
-    plt.savefig(buffer)
-    plt.close()
-    buffer.seek(0)
-    image = discord.File(buffer, "graph.png")
-    return image
+from ..datasets import InvalidDataset, SeriesReader, lttb
+from ..expression import InvalidExpression, compile_expression, normalize_expression
+from ..utils import AuthorOnlyView
+
+CHUNK_SIZE = 1024 * 1024
+MAX_ATTACHMENT_SIZE = 32 * 1024 * 1024
+MAX_CATEGORIES = 50
+
+# half the width of the default ±40 window equation graphs open with
+HALF_SPAN = 40.0
+
+def labels(values) -> list[str]:
+    # the shortest digits that read back as the same float, so distinct values never share a category
+    return [np.format_float_positional(i, trim="-") for i in values]
+
+class DataPoints(commands.Converter):
+    """parses the rest of the input into a float array, failing on the first value that isn't a number"""
+
+    async def convert(self, ctx, argument: str) -> np.ndarray:
+        try:
+            data = np.array(argument.replace(",", " ").split(), dtype=float)
+        except ValueError:
+            raise commands.BadArgument("data points must be numerical values!") from None
+
+        if not data.size or not np.isfinite(data).all():
+            raise commands.BadArgument("data points must be numerical values!")
+        return data
+
+class ViewportButton(discord.ui.Button):
+
+    view: EquationView
+
+    def __init__(self, label: str, action, *, row: int):
+        super().__init__(label=label, style=discord.ButtonStyle.gray, row=row)
+        self.action = action
+
+    async def callback(self, interaction: discord.Interaction):
+        self.action(self.view)
+        self.view.version += 1
+        version = self.view.version
+
+        # acknowledged before rendering, which can take longer than the 3 seconds discord waits for a response
+        await interaction.response.defer()
+
+        try:
+            image = await self.view.render()
+        except InvalidExpression as e:
+            return await interaction.followup.send(f"Can't draw that window: {e}", ephemeral=True)
+
+        # a later press is already rendering a newer window, let its edit be the one that lands
+        if version != self.view.version:
+            return
+
+        return await interaction.message.edit(attachments=[image], view=self.view)
+
+class EquationView(AuthorOnlyView):
+    """pan and zoom buttons for an equation graph; each step renders the new window only"""
+
+    def __init__(self, cog, author: discord.User, expression: str, *, timeout: float = 300):
+        super().__init__(author, timeout=timeout)
+
+        self.cog = cog
+        self.expression = expression
+        self.message = None
+        self.version: int = 0
+        self.reset()
+
+        self.add_item(ViewportButton("◀", lambda view: view.pan(-1, 0), row=0))
+        self.add_item(ViewportButton("▲", lambda view: view.pan(0, 1), row=0))
+        self.add_item(ViewportButton("▼", lambda view: view.pan(0, -1), row=0))
+        self.add_item(ViewportButton("▶", lambda view: view.pan(1, 0), row=0))
+        self.add_item(ViewportButton("+", lambda view: view.zoom(0.5), row=1))
+        self.add_item(ViewportButton("-", lambda view: view.zoom(2), row=1))
+        self.add_item(ViewportButton("reset", EquationView.reset, row=1))
+
+    def reset(self):
+        self.center = (0.0, 0.0)
+        self.half_span = HALF_SPAN
+
+    def pan(self, dx: int, dy: int):
+        # half a window per step, so consecutive views overlap
+        x, y = self.center
+        self.center = (x + dx * self.half_span, y + dy * self.half_span)
+
+    def zoom(self, factor: float):
+        self.half_span = min(max(self.half_span * factor, 1e-6), 1e6)
+
+    @property
+    def window(self):
+        x, y = self.center
+        return (x - self.half_span, x + self.half_span), (y - self.half_span, y + self.half_span)
+
+    async def render(self) -> discord.File:
+        return await self.cog.render("equation", self.expression, *self.window)
+
+    async def on_timeout(self):
+        if self.message:
+            await self.message.edit(view=None)
 
 class Graphing(commands.Cog):
 
@@ -162,63 +112,98 @@ class Graphing(commands.Cog):
         self.bot    = bot
         self.loop   = asyncio.get_running_loop()
 
-    @commands.command(name="bar")
-    async def bar(self, ctx, *args):
-        if not data_check(args):
-            return await ctx.send("data points must be numerical values!")
-
-        image = await bar(*args)
+    async def render(self, chart: str, *args) -> discord.File:
+        buffer = await self.bot.renderer.render(chart, *args)
+        return discord.File(buffer, "graph.png")
+
+    async def read_attachment(self, attachment: discord.Attachment):
+        """streams a CSV or text attachment into an (x, y) pair of arrays"""
+
+        if attachment.size > MAX_ATTACHMENT_SIZE:
+            raise InvalidDataset(f"That file is too large, the limit is {MAX_ATTACHMENT_SIZE // 1024 // 1024} MiB")
+
+        reader = SeriesReader()
+        async with self.bot.web.get(attachment.url) as response:
+            if not response.ok:
+                raise InvalidDataset(f"{response.status}, Something went wrong while downloading that file :(")
+
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await asyncio.to_thread(reader.feed, chunk)
+
+        return await asyncio.to_thread(reader.close)
+
+    async def plot(self, ctx, chart: str, data):
+        if ctx.message.attachments:
+            try:
+                x, y = await self.read_attachment(ctx.message.attachments[0])
+            except InvalidDataset as e:
+                return await ctx.send(str(e))
+
+            if chart not in ("bar", "pie"):
+                # millions of points draw the same picture as one per pixel column
+                kept = await asyncio.to_thread(lttb, x, y)
+                x, y = x[kept], y[kept]
+        elif data is not None:
+            x, y = data, data
+        else:
+            return await ctx.send("Give me some data points, or attach a CSV file!")
+
+        if chart in ("bar", "pie"):
+            # checked before labelling, which would otherwise format every row of a large file
+            if len(y) > MAX_CATEGORIES:
+                return await ctx.send(f"A {chart} chart can show at most {MAX_CATEGORIES} values, you gave {len(y):,}")
+            if chart == "pie" and (y < 0).any():
+                return await ctx.send("pie chart values can't be negative!")
+            x = labels(x)
+        elif data is not None:
+            x = labels(x)
+
+        if chart == "exponent":
+            image = await self.render(chart, y)
+        else:
+            image = await self.render(chart, x, y)
         return await ctx.send(file=image)
 
-    @commands.command(name="pie")
-    async def pie(self, ctx, *args):
-        if not data_check(args):
-            return await ctx.send("data points must be numerical values!")
+    @commands.command(name="bar")
+    async def bar(self, ctx, *, data: DataPoints = None):
+        return await self.plot(ctx, "bar", data)
 
-        image = await pie(*args)
-        return await ctx.send(file=image)
+    @commands.command(name="pie")
+    async def pie(self, ctx, *, data: DataPoints = None):
+        return await self.plot(ctx, "pie", data)
 
     @commands.command(name="scatterplot")
-    async def scatterplot(self, ctx, *args):
-        if not data_check(args):
-            return await ctx.send("data points must be numerical values!")
-
-        image = await scatter(*args)
-        return await ctx.send(file=image)
+    async def scatterplot(self, ctx, *, data: DataPoints = None):
+        return await self.plot(ctx, "scatter", data)
 
     @commands.command(name="linegraph", aliases=["line"])
-    async def linegraph(self, ctx, *args):
-        if not data_check(args):
-            return await ctx.send("data points must be numerical values!")
-
-        image = await line(*args)
-        return await ctx.send(file=image)
+    async def linegraph(self, ctx, *, data: DataPoints = None):
+        return await self.plot(ctx, "line", data)
 
     @commands.command(name="quadratic",  aliases=["quad"])
     async def quadratic(self, ctx, a: float, b: float, c: float):
-        image = await quadratic(a, b, c)
+        image = await self.render("quadratic", a, b, c)
         return await ctx.send(file=image)
 
     @commands.command(name="linear")
     async def linear(self, ctx, m: float, b: float):
-        image = await linear(m, b)
+        image = await self.render("linear", m, b)
         return await ctx.send(file=image)
 
     @commands.command(name="equation", aliases=["eq", "graph"])
-    async def equation(self, ctx, equation: str):
+    async def equation(self, ctx, *, equation: str):
         try:
-            image = await equation_(equation)
-            return await ctx.send(file=image)
-        except TypeError:
-            return await ctx.send("Invalid equation\nMake sure the only variable present is `x`!")
+            compile_expression(equation)
+            view = EquationView(self, ctx.author, normalize_expression(equation))
+            image = await view.render()
+            view.message = await ctx.send(file=image, view=view)
+            return view.message
+        except InvalidExpression as e:
+            return await ctx.send(f"Invalid equation: {e}\nMake sure the only variable present is `x`!")
 
     @commands.command(name="exponential", aliases=["exp"])
-    async def exponential(self, ctx, *args):
-        if not data_check(args):
-            return await ctx.send("data points must be numerical values!")
-
-        image = await exponent(*args)
-        return await ctx.send(file=image)
+    async def exponential(self, ctx, *, data: DataPoints = None):
+        return await self.plot(ctx, "exponent", data)
 
-def setup(client):
-    client.add_cog(Graphing(client))
\ No newline at end of file
+async def setup(client):
+    await client.add_cog(Graphing(client))
\ No newline at end of file
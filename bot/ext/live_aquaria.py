@@ -1,18 +1,114 @@
 from typing import Any, ClassVar, Optional
-from urllib.parse import quote
+from urllib.parse import quote, urljoin
+from io import BytesIO
+import asyncio
+import math
 import json
 
 import discord
-from discord.ext import commands
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from discord.ext import commands, tasks
+from PIL import Image, ImageDraw, ImageFont
 
 from ..bot import AquaBot
+from ..cache import SizedLRU, SWRCache
+from ..catalog import ProductCatalog
 from ..context import AquaContext
+from ..extract import *
 
 from ..utils import *
 
+BASE_URL = 'https://www.liveaquaria.com'
+
+PRODUCT_PAGE = Extractor(
+    ld_json="(//script[@type='application/ld+json'])[1]/node()[1]",
+    image=f"((//div[{has_class('product-image')}])[1]//img)[1]/@src",
+)
+
+RESULTS_PAGE = Extractor(
+    products=f"//div[{has_class('product')}]",
+)
+
+RESULT_ITEM = Extractor(
+    url='(.//a)[1]/@href',
+    img=f"((.//div[{has_class('product_image')}])[1]//img[{has_class('image')}])[1]/@src",
+    price=f"((.//div[{has_class('product_details')}])[1]//div[{has_class('price')}])[1]/node()[1]",
+    name=f"((.//div[{has_class('product_details')}])[1]//h3[{has_class('title')}])[1]/node()[1]",
+)
+
+def parse_product_html(html: str) -> dict[str, Any]:
+    page = PRODUCT_PAGE(parse_html(html))
+    data = json.loads(page['ld_json'][0])
+
+    if not (img := data.get('image')) or img == BASE_URL:
+        image = BASE_URL + page['image'][0]
+        data['image'] = image
+
+    return data
+
+def _format_item(item: Node) -> dict[str, str]:
+    fields = RESULT_ITEM(item)
+    url = next(iter(fields['url']), None)
+    img = fields['img'][0]
+    price = fields['price'][0]
+    name = fields['name'][0]
+
+    return {
+        'name': name, 'url': url,
+        'img': img, 'price': price,
+    }
+
+def parse_results_html(html: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
+    results = RESULTS_PAGE(parse_html(html))['products']
+    results = [_format_item(item) for item in results[:limit]]
+    return results
+
+THUMBNAIL_SIZE = (160, 160)
+GRID_COLUMNS = 5
+GRID_PADDING = 8
+GRID_FONT = 'bot/assets/segoe-ui-semilight-411.ttf'
+
+def resize_thumbnail(data: bytes) -> bytes:
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert('RGBA')
+        image.thumbnail(THUMBNAIL_SIZE)
+
+        buffer = BytesIO()
+        image.save(buffer, 'PNG')
+        return buffer.getvalue()
+
+def compose_grid(thumbnails: list[Optional[bytes]], background: int) -> BytesIO:
+    """lays out numbered thumbnails as a single contact sheet, missing thumbnails are left blank"""
+
+    width, height = THUMBNAIL_SIZE
+    columns = min(GRID_COLUMNS, len(thumbnails))
+    rows = math.ceil(len(thumbnails) / columns)
+
+    sheet = Image.new(
+        'RGBA',
+        (columns * (width + GRID_PADDING) + GRID_PADDING, rows * (height + GRID_PADDING) + GRID_PADDING),
+        (*background.to_bytes(3, 'big'), 255),
+    )
+    draw = ImageDraw.Draw(sheet)
+    font = ImageFont.truetype(GRID_FONT, 24)
+
+    for i, data in enumerate(thumbnails):
+        x = GRID_PADDING + (i % columns) * (width + GRID_PADDING)
+        y = GRID_PADDING + (i // columns) * (height + GRID_PADDING)
+
+        if data:
+            with Image.open(BytesIO(data)) as thumbnail:
+                offset = (x + (width - thumbnail.width) // 2, y + (height - thumbnail.height) // 2)
+                sheet.paste(thumbnail, offset, thumbnail)
+
+        draw.text((x + 4, y), str(i + 1), font=font, fill='white', stroke_width=2, stroke_fill='black')
+
+    buffer = BytesIO()
+    sheet.save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
 class LAResultsSelect(discord.ui.Select):
+    products: ClassVar[SWRCache[str, dict[str, Any]]] = SWRCache(fresh_for=300, expire_after=3600)
 
     def __init__(self, bot: AquaBot, items: list[dict[str, str]]) -> None:
 
@@ -33,29 +129,21 @@ class LAResultsSelect(discord.ui.Select):
         )
         self.bot = bot
 
-    @to_thread
-    def _parse_product_html(self, html: str) -> dict[str, Any]:
-        BASE_URL = 'https://www.liveaquaria.com'
-
-        soup = BeautifulSoup(html, features='lxml')
-        data = soup.find('script', type='application/ld+json').contents[0]
-        data = json.loads(data)
+    async def _parse_product_html(self, html: str) -> dict[str, Any]:
+        return await self.bot.run_parser(parse_product_html, html)
 
-        if not (img := data.get('image')) or img == BASE_URL:
-            image_div = soup.find('div', class_='product-image')
-            image = BASE_URL + image_div.find('img').get('src')
-            data['image'] = image
-
-        return data
-
-    async def scrape_la_product(self, product_url: str) -> tuple[str, dict[str, Any]]:
-        async with self.bot.session.get(product_url) as response:
+    async def _scrape_la_product(self, product_url: str) -> dict[str, Any]:
+        async with self.bot.web.get(product_url) as response:
             if response.ok:
                 html = await response.text(encoding='utf-8')
-                return (product_url, await self._parse_product_html(html))
+                return await self._parse_product_html(html)
             else:
                 raise ApiError(f'{response.status}, Something went wrong while searching :(')
 
+    async def scrape_la_product(self, product_url: str) -> tuple[str, dict[str, Any]]:
+        data = await self.products.get(product_url, lambda: self._scrape_la_product(product_url))
+        return product_url, data
+
     async def callback(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer()
 
@@ -76,39 +164,75 @@ class LAResultsSelect(discord.ui.Select):
 
 class LiveAquaria(commands.Cog):
     LA_URL: ClassVar[str] = 'https://aquarium-fish.liveaquaria.com/api/Search/'
+    CATALOG_SEEDS: ClassVar[list[str]] = [
+        'fish', 'clownfish', 'tang', 'angelfish', 'wrasse', 'goby', 'blenny', 'damselfish',
+        'tetra', 'cichlid', 'betta', 'livebearer', 'catfish', 'pleco', 'coral', 'anemone',
+        'shrimp', 'crab', 'snail', 'starfish', 'urchin', 'plant', 'invertebrate',
+    ]
 
     def __init__(self, bot: AquaBot) -> None:
         self.bot = bot
+        self.inflight = SingleFlight()
+        self.thumbnails: SizedLRU[str, bytes] = SizedLRU(16 * 1024 * 1024)
+        self.search_cache: SWRCache[tuple[str, Optional[int]], list[dict[str, str]]] = SWRCache(fresh_for=300, expire_after=3600)
 
-    def _format_item(self, item: Tag) -> dict[str, str]:
-        url = item.find('a').get('href')
-        img = item.find('div', class_='product_image')
-        img = img.find('img', class_='image').get('src')
+        self.catalog: Optional[ProductCatalog] = None
+        self.catalog_seeds: list[str] = self.bot.config.get('LA_CATALOG_SEEDS', self.CATALOG_SEEDS)
+        self._seed_index: int = 0
 
-        details = item.find('div', class_='product_details')
-        price = details.find('div', class_='price').contents[0]
-        name = details.find('h3', class_='title').contents[0]
+        if self.bot.config.get('LA_CATALOG', False):
+            self.catalog = ProductCatalog()
+            self.crawl_catalog.change_interval(seconds=self.bot.config.get('LA_CATALOG_INTERVAL', 60))
+            self.crawl_catalog.start()
 
-        return {
-            'name': name, 'url': url,
-            'img': img, 'price': price,
-        }
+    def cog_unload(self) -> None:
+        self.crawl_catalog.cancel()
+        self.search_cache.close()
 
-    @to_thread
-    def _parse_results_html(self, html: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
-        soup = BeautifulSoup(html, features='lxml')
-        results = soup.find_all('div', class_='product')
-        results = [self._format_item(item) for item in results[:limit]]
-        return results
+    @tasks.loop(seconds=60)
+    async def crawl_catalog(self) -> None:
+        """crawls one seed query per iteration, so the catalog is built and refreshed incrementally"""
 
-    async def scrape_la(self, query: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
-        async with self.bot.session.get(self.LA_URL + quote(query)) as response:
+        seed = self.catalog_seeds[self._seed_index % len(self.catalog_seeds)]
+        self._seed_index += 1
+
+        try:
+            products = await self._scrape_la(seed)
+        except Exception as e:
+            self.bot._logger.warning(f'failed to crawl liveaquaria for {seed!r}: {e!r}')
+            return
+
+        self.catalog.add_many(products, category=seed)
+
+        # products that have not turned up in the last few full passes over the seeds are most likely gone
+        self.catalog.prune(self.crawl_catalog.seconds * len(self.catalog_seeds) * 3)
+
+    @crawl_catalog.before_loop
+    async def before_crawl_catalog(self) -> None:
+        await self.bot.wait_until_ready()
+
+    async def search_la(self, query: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
+        """searches the local catalog when it is enabled, falling back to liveaquaria"""
+
+        if self.catalog and (results := self.catalog.search(query, limit=limit)):
+            return results
+        return await self.scrape_la(query, limit=limit)
+
+    async def _parse_results_html(self, html: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
+        return await self.bot.run_parser(parse_results_html, html, limit=limit)
+
+    async def _scrape_la(self, query: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
+        async with self.bot.web.get(self.LA_URL + quote(query)) as response:
             if response.ok:
                 html = await response.text(encoding='utf-8')
                 return await self._parse_results_html(html, limit=limit)
             else:
                 raise ApiError(f'{response.status}, Something went wrong while searching :(')
 
+    async def scrape_la(self, query: str, *, limit: Optional[int] = None) -> list[dict[str, str]]:
+        key = (normalize(query), limit)
+        return await self.search_cache.get(key, lambda: self.inflight.do(key, self._scrape_la, query, limit=limit))
+
     def _format_item_embed(self, item: dict[str, str]) -> discord.Embed:
         embed = discord.Embed(
             title=item['name'],
@@ -119,10 +243,33 @@ class LiveAquaria(commands.Cog):
         embed.set_thumbnail(url=item['img'])
         return embed
 
-    @commands.command(name='liveaquaria', aliases=['la'])
-    @commands.cooldown(1, 5, commands.BucketType.member)
-    async def live_aquaria(self, ctx: AquaContext, *, query: str) -> discord.Message:
-        results = await self.scrape_la(query, limit=10)
+    async def _fetch_thumbnail(self, url: str, semaphore: asyncio.Semaphore) -> Optional[bytes]:
+        if (data := self.thumbnails.get(url)) is not None:
+            return data
+
+        try:
+            async with semaphore, self.bot.web.get(url) as response:
+                response.raise_for_status()
+                data = await response.read()
+
+            data = await asyncio.to_thread(resize_thumbnail, data)
+        except Exception:
+            return None
+
+        self.thumbnails.set(url, data)
+        return data
+
+    async def render_grid(self, results: list[dict[str, str]]) -> discord.File:
+        semaphore = asyncio.Semaphore(4)
+        thumbnails = await asyncio.gather(*(
+            self._fetch_thumbnail(urljoin(BASE_URL, item['img']), semaphore) for item in results
+        ))
+
+        fp = await asyncio.to_thread(compose_grid, thumbnails, self.bot.color)
+        return discord.File(fp, 'results.png')
+
+    async def do_live_aquaria(self, ctx: AquaContext, query: str, *, grid: bool = False) -> discord.Message:
+        results = await self.search_la(query, limit=10)
 
         if not results:
             return await ctx.reply(f'No results were found for the query : {query}')
@@ -139,7 +286,23 @@ class LiveAquaria(commands.Cog):
 
         paginator = Paginator(ctx, entries)
         paginator.view.add_item(LAResultsSelect(self.bot, results))
-        return await paginator.start(reply=True)
+        message = await paginator.start(reply=True)
+
+        if grid:
+            # a message of its own: attached to the paginator, it would show above every page it flips to
+            await ctx.send(file=await self.render_grid(results))
+        return message
+
+    @commands.command(name='liveaquaria', aliases=['la'])
+    @commands.cooldown(1, 5, commands.BucketType.member)
+    async def live_aquaria(self, ctx: AquaContext, *, query: str) -> discord.Message:
+        return await self.do_live_aquaria(ctx, query)
+
+    @commands.command(name='liveaquariagrid', aliases=['lagrid'])
+    @commands.cooldown(1, 5, commands.BucketType.member)
+    async def live_aquaria_grid(self, ctx: AquaContext, *, query: str) -> discord.Message:
+        """also sends the results' pictures side by side, numbered like the summary page"""
+        return await self.do_live_aquaria(ctx, query, grid=True)
 
-def setup(bot: AquaBot) -> None:
-    bot.add_cog(LiveAquaria(bot))
\ No newline at end of file
+async def setup(bot: AquaBot) -> None:
+    await bot.add_cog(LiveAquaria(bot))
\ No newline at end of file
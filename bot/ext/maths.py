@@ -1,17 +1,15 @@
 from __future__ import annotations
 
+from typing import Optional
+from collections import OrderedDict
 from io import BytesIO
+import asyncio
+import time
 import re
 
 import discord
 from discord.ext import commands
 
-import matplotlib
-matplotlib.use('agg')
-
-from matplotlib import pyplot as plt
-import numpy as np
-
 from ..bot import AquaBot
 from ..context import AquaContext
 from ..utils import *
@@ -20,6 +18,12 @@ X = '\U0001d465'
 DEL = 'DEL'
 WS = '\u200b'
 
+TITLE = 'Linear Equation Calculator'
+DESCRIPTION = 'Use the following buttons to input an equation in the format of: `y = mx + b`\nExample: `8 = 5x + 3`\nI will solve for `x`'
+
+# presses closer together than this are answered with a single edit
+COALESCE_DELAY = 0.3
+
 class InvalidEquation(Exception):
     pass
 
@@ -31,32 +35,96 @@ class CalcButton(discord.ui.Button):
         super().__init__(style=style, label=str(label), row=row, custom_id=custom_id)
 
     async def callback(self, interaction: discord.Interaction):
+        view = self.view
 
-        process_embed = discord.Embed(
-            title='Linear Equation Calculator',
-            description='Use the following buttons to input an equation in the format of: `y = mx + b`\nExample: `8 = 5x + 3`\nI will solve for `x`',
-            color=self.view.ctx.bot.color,
-        )
+        if self.label == WS:
+            return await interaction.response.defer()
+
+        state = view.store.get(interaction.message.id)
+        if state is None:
+            return await interaction.response.defer()
+
+        # every press supersedes the edits still pending from earlier ones
+        state.version += 1
+        version = state.version
 
         if self.label == 'Enter':
+            view.store.pop(interaction.message.id)
+
+            # solving and rendering the graph can take longer than the 3 seconds discord waits for a response
+            await interaction.response.defer()
             try:
-                m, x, b, y, steps = self.view.solve_lineareq_2(self.view.equation)
-                fp = await self.view.linear_graph(m, b, x, y)
-                embed = discord.Embed(title='Solution:', description=f'```py\n{steps}\n```', color=self.view.ctx.bot.color)
-                url = await post_cdn(self.view.ctx.bot.session, fp)
-                embed.set_image(url=url)
-                return await interaction.message.edit(embed=embed, view=None)
+                m, x, b, y = view.solve_lineareq_2(state.equation)
+                # the graph is submitted first and renders while the solution is written out, then goes up with the edit itself
+                graph = view.linear_graph(m, b, x, y)
+
+                steps = view.solution_steps(state.equation, m, x, b, y)
+                embed = discord.Embed(title='Solution:', description=f'```py\n{steps}\n```', color=view.bot.color)
+                embed.set_image(url='attachment://graph.png')
+
+                file = discord.File(await graph, 'graph.png')
+                return await interaction.message.edit(embed=embed, attachments=[file], view=None)
             except InvalidEquation:
-                return await interaction.message.edit(content=f'`{self.view.equation}` is an invalid einear equation, please try again.', embed=None, view=None)
-        elif self.label == DEL:
-            self.view.equation = self.view.equation[:-1]
-            process_embed.description += f"\n\n```py\n{self.view.equation.replace('x', X) or WS}\n```"
-            await interaction.message.edit(embed=process_embed)
+                return await interaction.message.edit(content=f'`{state.equation}` is an invalid linear equation, please try again.', embed=None, view=None)
+
+        if self.label == DEL:
+            state.equation = state.equation[:-1]
         else:
-            term = 'x' if self.label == X else self.label
-            self.view.equation += term
-            process_embed.description += f"\n\n```py\n{self.view.equation.replace('x', X)}\n```"
-            await interaction.message.edit(embed=process_embed)
+            state.equation += 'x' if self.label == X else self.label
+
+        # state is updated in arrival order right away, but only the last press of a burst edits the message
+        await asyncio.sleep(COALESCE_DELAY)
+        if version != state.version:
+            return await interaction.response.defer()
+
+        return await interaction.response.edit_message(embed=view.process_embed(state.equation))
+
+class Calculation:
+    """the state of one calculator message"""
+
+    __slots__ = ('author_id', 'equation', 'version', 'touched')
+
+    def __init__(self, author_id: int, equation: str = '') -> None:
+        self.author_id = author_id
+        self.equation = equation
+        self.version = 0
+        self.touched = time.monotonic()
+
+class CalculationStore:
+    """calculator states keyed by message ID, dropped once they go `idle_timeout` seconds without a press"""
+
+    def __init__(self, idle_timeout: float = 300) -> None:
+        self.idle_timeout = idle_timeout
+        self._states: OrderedDict[int, Calculation] = OrderedDict()
+
+    def _expire(self) -> None:
+        # states are kept in the order they were last touched, so only the expired ones are looked at
+        deadline = time.monotonic() - self.idle_timeout
+        while self._states:
+            message_id, state = next(iter(self._states.items()))
+            if state.touched > deadline:
+                break
+            del self._states[message_id]
+
+    def get(self, message_id: int) -> Optional[Calculation]:
+        self._expire()
+
+        if (state := self._states.get(message_id)) is not None:
+            state.touched = time.monotonic()
+            self._states.move_to_end(message_id)
+        return state
+
+    def add(self, message_id: int, state: Calculation) -> Calculation:
+        self._expire()
+
+        self._states[message_id] = state
+        return state
+
+    def pop(self, message_id: int) -> Optional[Calculation]:
+        return self._states.pop(message_id, None)
+
+    def __len__(self) -> int:
+        return len(self._states)
 
 class CalcUI(AuthorOnlyView):
 
@@ -96,36 +164,79 @@ class CalcUI(AuthorOnlyView):
             return float('NaN')
         return (a + b * c) / d
 
-class LinearUI(AuthorOnlyView):
+class LinearUI(discord.ui.View):
+    """
+    the calculator's buttons, one persistent view shared by every calculator message
+    what has been typed on each message lives in `store`, and is read back from the message if it's not there
+    """
 
-    def __init__(self, ctx: AquaContext, author: discord.User, *, timeout: float = None) -> None:
-        super().__init__(author, timeout=timeout)
+    def __init__(self, bot: AquaBot, store: CalculationStore) -> None:
+        super().__init__(timeout=None)
 
-        self.ctx = ctx
-        self.equation: str = ''
+        self.bot = bot
+        self.store = store
 
         for i in (1, 2, 3):
-            self.add_item(CalcButton(i, row=0))
+            self.add_item(CalcButton(i, row=0, custom_id=f'linears:{i}'))
         for i in (4, 5, 6):
-            self.add_item(CalcButton(i, row=1))
+            self.add_item(CalcButton(i, row=1, custom_id=f'linears:{i}'))
         for i in (7, 8, 9):
-            self.add_item(CalcButton(i, row=2))
+            self.add_item(CalcButton(i, row=2, custom_id=f'linears:{i}'))
 
-        self.add_item(CalcButton(".", row=3))
-        self.add_item(CalcButton(0, row=3))
-        self.add_item(CalcButton("=", row=3, style=discord.ButtonStyle.blurple))
+        self.add_item(CalcButton(".", row=3, custom_id='linears:.'))
+        self.add_item(CalcButton(0, row=3, custom_id='linears:0'))
+        self.add_item(CalcButton("=", row=3, style=discord.ButtonStyle.blurple, custom_id='linears:='))
 
-        self.add_item(CalcButton('+', style=discord.ButtonStyle.red, row=0))
-        self.add_item(CalcButton('-', style=discord.ButtonStyle.red, row=1))
-        self.add_item(CalcButton(X, style=discord.ButtonStyle.blurple, row=2))
-        self.add_item(CalcButton('Enter', style=discord.ButtonStyle.green, row=3))
+        self.add_item(CalcButton('+', style=discord.ButtonStyle.red, row=0, custom_id='linears:+'))
+        self.add_item(CalcButton('-', style=discord.ButtonStyle.red, row=1, custom_id='linears:-'))
+        self.add_item(CalcButton(X, style=discord.ButtonStyle.blurple, row=2, custom_id='linears:x'))
+        self.add_item(CalcButton('Enter', style=discord.ButtonStyle.green, row=3, custom_id='linears:enter'))
 
-        self.add_item(CalcButton(DEL, style=discord.ButtonStyle.red, row=0))
+        self.add_item(CalcButton(DEL, style=discord.ButtonStyle.red, row=0, custom_id='linears:del'))
 
         for i in range(1, 4):
-            self.add_item(CalcButton(WS, style=discord.ButtonStyle.grey, row=i))
+            self.add_item(CalcButton(WS, style=discord.ButtonStyle.grey, row=i, custom_id=f'linears:pad:{i}'))
 
-    def solve_lineareq_2(self, equation: str) -> tuple[Number, str]:
+    async def recover(self, message: discord.Message) -> Optional[Calculation]:
+        """
+        rebuilds a calculator's state from its message, after a restart or once the stored state expired:
+        the equation from the embed's code block, and the author from the command message it replied to
+        """
+
+        if not message.embeds or message.embeds[0].title != TITLE or not message.reference:
+            return None
+
+        equation = ''
+        if match := re.search(r'```py\n(.*)\n```', message.embeds[0].description or '', re.S):
+            equation = match.group(1).replace(X, 'x').replace(WS, '')
+
+        command = message.reference.resolved
+        if not isinstance(command, discord.Message):
+            try:
+                command = await message.channel.fetch_message(message.reference.message_id)
+            except discord.HTTPException:
+                return None
+
+        return self.store.add(message.id, Calculation(command.author.id, equation))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        state = self.store.get(interaction.message.id) or await self.recover(interaction.message)
+
+        if state is None:
+            await interaction.response.send_message('This calculator has expired, start a new one with `linears`', ephemeral=True)
+            return False
+        if interaction.user.id != state.author_id:
+            await interaction.response.send_message(f'This interaction can only be used by <@{state.author_id}>', ephemeral=True)
+            return False
+        return True
+
+    def process_embed(self, equation: str = None) -> discord.Embed:
+        embed = discord.Embed(title=TITLE, description=DESCRIPTION, color=self.bot.color)
+        if equation is not None:
+            embed.description += f"\n\n```py\n{equation.replace('x', X) or WS}\n```"
+        return embed
+
+    def solve_lineareq_2(self, equation: str) -> tuple[Number, Number, Number, Number]:
         """
         parses a  2-step linear equation: (y = mx + b) as a string
         converts select terms to a float and evaluates it
@@ -141,67 +252,53 @@ class LinearUI(AuthorOnlyView):
             b = num(terms.group(6))
             b = -1 * b if operator == '-' else b
 
-            mx = y - b
-            x = mx / m
-            steps = (
-                f'{equation}\n'+
-                (
-                    f'{m}{X} = {y} - {b}\n' if b > 0 else
-                    f'{m}{X} = {y} + {abs(b)}\n' if b < 0 else
-                    f'{m}{X} = {y}\n'
-                ) +
-                f'{X} = {mx} / {m}\n'+
-                f'{X} = {x}'
-            )
-            return m, x, b, y, steps
+            x = (y - b) / m
+            return m, x, b, y
         else:
             raise InvalidEquation('That is not a valid Equation!')
 
-    @to_thread
-    def linear_graph(self, m: Number, b: Number, x: Number, y: Number) -> BytesIO:
-        """Plots a linear equation graph"""
-
-        plt.style.use(["fast", "fivethirtyeight", "ggplot"])
-        plt.style.use("bmh")
-        buffer = BytesIO()
-
-        lim = abs(x) * 3
-        x_ = np.linspace(-lim, lim, 100)
-        y_  = [(m * i + b) for i in x_]
-
-        fig = plt.figure()
-        ax = fig.add_subplot(1, 1, 1)
-        ax.spines['left'].set_position('center')
-        ax.spines['bottom'].set_position('zero')
-        ax.spines['right'].set_color('none')
-        ax.spines['top'].set_color('none')
-        ax.xaxis.set_ticks_position('bottom')
-        ax.yaxis.set_ticks_position('left')
-
-        plt.plot(x,y, 'r')
-        plt.plot(x_, y_)
-        plt.plot(x, y, marker='o')
-        plt.savefig(buffer)
-        plt.close()
+    def solution_steps(self, equation: str, m: Number, x: Number, b: Number, y: Number) -> str:
+        """writes out the steps solving `equation` for x"""
+
+        mx = y - b
+        return (
+            f'{equation}\n'+
+            (
+                f'{m}{X} = {y} - {b}\n' if b > 0 else
+                f'{m}{X} = {y} + {abs(b)}\n' if b < 0 else
+                f'{m}{X} = {y}\n'
+            ) +
+            f'{X} = {mx} / {m}\n'+
+            f'{X} = {x}'
+        )
 
-        buffer.seek(0)
-        return buffer
+    def linear_graph(self, m: Number, b: Number, x: Number, y: Number) -> asyncio.Future[BytesIO]:
+        """Plots a linear equation graph, starting right away"""
+        return self.bot.renderer.submit('linear_solution', m, b, x, y)
 
 class MathCog(commands.Cog):
 
     def __init__(self, bot: AquaBot) -> None:
         self.bot = bot
+        self.calculations = CalculationStore(idle_timeout=300)
 
-    @commands.command(name='linears')
-    async def linear(self, ctx: AquaContext) -> discord.Message:
-
-        embed = discord.Embed(
-            title='Linear Equation Calculator',
-            description='Use the following buttons to input an equation in the format of: `y = mx + b`\nExample: `8 = 5x + 3`\nI will solve for `x`',
-            color=self.bot.color,
-        )
+        # registered once, this view handles the buttons of every calculator message, including ones sent before a restart
+        self.calculator = LinearUI(bot, self.calculations)
+        bot.add_view(self.calculator)
 
-        return await ctx.send(embed=embed, view=LinearUI(ctx, ctx.author, timeout=300))
+    def cog_unload(self) -> None:
+        self.calculator.stop()
 
-def setup(bot: AquaBot) -> None:
-    bot.add_cog(MathCog(bot))
\ No newline at end of file
+    @commands.command(name='linears')
+    async def linear(self, ctx: AquaContext) -> discord.Message:
+        # replying keeps a reference to the author on the message, which the calculator recovers its state from
+        # the message gets buttons of its own, with the same custom IDs, so presses are dispatched to the persistent view;
+        # stopping them right away unregisters whatever sending them registered for this message
+        buttons = LinearUI(self.bot, self.calculations)
+        message = await ctx.reply(embed=self.calculator.process_embed(), view=buttons, mention_author=False)
+        buttons.stop()
+        self.calculations.add(message.id, Calculation(ctx.author.id))
+        return message
+
+async def setup(bot: AquaBot) -> None:
+    await bot.add_cog(MathCog(bot))
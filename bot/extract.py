@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any, Union
+
+from lxml import etree
+
+__all__: tuple[str] = (
+    'Node',
+    'has_class',
+    'parse_html',
+    'contents',
+    'strings',
+    'stripped_strings',
+    'Extractor',
+)
+
+Node = Union[etree._Element, str]
+
+_CONTENTS = etree.XPath('node()', smart_strings=False)
+_STRINGS = etree.XPath('.//text()', smart_strings=False)
+
+def has_class(name: str) -> str:
+    """XPath predicate matching elements with `name` in their class list, like bs4's `class_=`"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def parse_html(html: str) -> etree._Element:
+    try:
+        root = etree.HTML(html)
+    except ValueError:
+        # lxml refuses str input carrying an XML encoding declaration
+        root = etree.HTML(html.encode('utf-8'))
+
+    if root is None:
+        root = etree.HTML('<html></html>')
+    return root
+
+def contents(node: etree._Element) -> list[Node]:
+    """the child nodes of an element, text included; the equivalent of bs4's `Tag.contents`"""
+    return _CONTENTS(node)
+
+def strings(node: etree._Element) -> list[str]:
+    """every text node below an element; the equivalent of bs4's `Tag.strings`"""
+    return _STRINGS(node)
+
+def stripped_strings(node: etree._Element) -> list[str]:
+    """every non-blank text node below an element, stripped; the equivalent of bs4's `Tag.stripped_strings`"""
+    return [s for s in map(str.strip, _STRINGS(node)) if s]
+
+class Extractor:
+    """
+    A page layout declared as named XPath expressions.
+
+    The expressions are compiled once, when the extractor is created,
+    and calling the extractor evaluates all of them against a parsed node.
+    """
+
+    def __init__(self, **fields: str) -> None:
+        self.fields: dict[str, etree.XPath] = {
+            name: etree.XPath(path, smart_strings=False) for name, path in fields.items()
+        }
+
+    def __call__(self, node: etree._Element) -> dict[str, Any]:
+        return {name: xpath(node) for name, xpath in self.fields.items()}
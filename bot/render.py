@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import multiprocessing
+import functools
+import hashlib
+import asyncio
+import json
+import os
+
+from .cache import FileCache
+
+__all__: tuple[str] = (
+    'render_key',
+    'RenderEngine',
+)
+
+# bump whenever a chart's look changes, so renders cached by older versions are no longer hit
+STYLE_VERSION = 1
+
+# matplotlib is only ever imported by the worker processes, through `bot.charts`
+
+def _init_worker() -> None:
+    from .charts import warm_up
+    warm_up()
+
+def _render_chart(name: str, *args: Any) -> bytes:
+    from .charts import render_chart
+    return render_chart(name, *args)
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # `2` and `2.0` draw the same chart, and so do `0.0` and `-0.0`
+        return float(value) + 0.0
+    if hasattr(value, 'tolist'):
+        return _normalize(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+def render_key(chart: str, args: tuple[Any, ...]) -> str:
+    """hashes a render job: the chart type, its normalized parameters and the style version"""
+    payload = json.dumps([STYLE_VERSION, chart, _normalize(args)], separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class RenderEngine:
+    """
+    Renders charts on a pool of `workers` processes, which import matplotlib and warm up its styles and fonts when spawned.
+    With a `cache`, finished PNGs are stored by their `render_key` and repeated jobs skip the workers entirely.
+    """
+
+    def __init__(self, workers: int = 2, *, cache: Optional[FileCache] = None) -> None:
+        self.workers = workers
+        self.cache = cache
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    async def start(self) -> None:
+        # workers are spawned on demand, submitting one job per worker starts and warms up all of them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)
+        ))
+
+    async def render(self, chart: str, *args: Any) -> BytesIO:
+        if self.cache is None:
+            return BytesIO(await self._render(chart, *args))
+
+        key = render_key(chart, args)
+        if (data := await self.cache.get(key)) is None:
+            data = await self._render(chart, *args)
+            await self.cache.set(key, data)
+
+        return BytesIO(data)
+
+    def submit(self, chart: str, *args: Any) -> asyncio.Future[BytesIO]:
+        """
+        like `render`, but the job is handed to the workers before this returns, so it runs while the caller carries on
+        only the in-memory tier of the cache is checked beforehand
+        """
+
+        loop = asyncio.get_running_loop()
+        key = render_key(chart, args) if self.cache is not None else None
+
+        if key is not None and (data := self.cache.memory.get(key)) is not None:
+            future = loop.create_future()
+            future.set_result(BytesIO(data))
+            return future
+
+        job = loop.run_in_executor(self._executor, functools.partial(_render_chart, chart, *args))
+        return asyncio.ensure_future(self._store(key, job))
+
+    async def _store(self, key: Optional[str], job: Awaitable[bytes]) -> BytesIO:
+        data = await job
+        if key is not None:
+            await self.cache.set(key, data)
+        return BytesIO(data)
+
+    async def _render(self, chart: str, *args: Any) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(_render_chart, chart, *args))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+__all__: tuple[str] = (
+    'name_key',
+    'SpeciesStore',
+)
+
+Record = dict[str, Any]
+
+def name_key(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+class SpeciesStore:
+    """
+    A local store of already parsed FishBase species records, stored in SQLite.
+
+    Records are kept as compressed JSON and indexed by URL, scientific name and common name,
+    so lookups never need to touch fishbase.se.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS species (
+            url         TEXT PRIMARY KEY,
+            sci_name    TEXT NOT NULL,
+            common_name TEXT NOT NULL,
+            record      BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS species_sci_name ON species (sci_name);
+        CREATE INDEX IF NOT EXISTS species_common_name ON species (common_name);
+    '''
+
+    COLUMNS: dict[str, str] = {
+        'gs': 'sci_name',
+        'CommonName': 'common_name',
+    }
+
+    def __init__(self, path: str) -> None:
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _pack(record: Record) -> bytes:
+        return zlib.compress(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Record:
+        return json.loads(zlib.decompress(blob))
+
+    def _get(self, url: str) -> Optional[Record]:
+        with self._lock:
+            row = self._db.execute('SELECT record FROM species WHERE url = ?', (url,)).fetchone()
+
+        if row:
+            return self._unpack(row[0])
+
+    def _find(self, type_: str, name: str) -> list[Record]:
+        column = self.COLUMNS[type_]
+
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT record FROM species WHERE {column} = ? ORDER BY sci_name', (name_key(name),)
+            ).fetchall()
+
+        return [self._unpack(blob) for blob, in rows]
+
+    def _put_many(self, records: Iterable[Record]) -> int:
+        rows = [
+            (record['url'], name_key(record['sci_name']), name_key(record['common_name']), self._pack(record))
+            for record in records
+        ]
+
+        with self._lock, self._db:
+            self._db.execute('BEGIN')
+            self._db.executemany('INSERT OR REPLACE INTO species VALUES (?, ?, ?, ?)', rows)
+
+        return len(rows)
+
+    async def get(self, url: str) -> Optional[Record]:
+        return await asyncio.to_thread(self._get, url)
+
+    async def find(self, type_: str, name: str) -> list[Record]:
+        """finds the records whose scientific (`gs`) or common (`CommonName`) name matches `name`"""
+        return await asyncio.to_thread(self._find, type_, name)
+
+    async def put_many(self, records: Iterable[Record]) -> int:
+        return await asyncio.to_thread(self._put_many, records)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM species').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,14 +1,12 @@
 from __future__ import annotations
 
-from typing import Awaitable, Optional, Callable, TypeVar, Union
+from typing import Awaitable, Hashable, Optional, Callable, TypeVar, Union
 from typing_extensions import ParamSpec
-from io import BytesIO
 import functools
 import asyncio
-import secrets
+import inspect
 
 import discord
-import aiohttp
 
 from .context import AquaContext
 from .bot import AquaBot as bot
@@ -16,12 +14,14 @@ from .bot import AquaBot as bot
 __all__: tuple[str] = (
     'Number',
     'num',
-    'post_cdn',
+    'normalize',
     'to_thread',
     'truncate',
     'ApiError',
+    'SingleFlight',
     'AuthorOnlyView',
     'PaginatorView',
+    'PageSource',
     'Paginator',
 )
 
@@ -30,27 +30,15 @@ T = TypeVar('T')
 
 Number = Union[int, float]
 
-async def post_cdn(session: aiohttp.ClientSession, fp: BytesIO) -> Optional[str]:
-    data = aiohttp.FormData()
-    data.add_field('file', fp, filename=f'{secrets.token_urlsafe()}.png')
-    base = 'https://cdn.lambdabot.cf'
-
-    async with session.post(
-        base + '/upload',
-        headers={'Authorization': 'Bearer aaa'},
-        data=data,
-        params={'directory': 'bomb_uploads'},
-    ) as r:
-        r.raise_for_status()
-        data = await r.json()
-        return base + '/uploads' + data.get('path')
-
 def num(n: str) -> Number:
     n = float(n)
     if n.is_integer():
         n = int(n)
     return n
 
+def normalize(query: str) -> str:
+    return ' '.join(query.lower().split())
+
 def to_thread(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
 
     @functools.wraps(func)
@@ -68,6 +56,45 @@ def truncate(content: str, limit: int = 2000) -> str:
 class ApiError(Exception):
     pass
 
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight task.
+
+    Every caller awaiting the same key gets that task's result, or its exception;
+    a caller being cancelled only cancels the task once nobody else is waiting on it.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[Hashable, asyncio.Future] = {}
+        self._waiters: dict[asyncio.Future, int] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, func: Callable[P, Awaitable[T]], *args: P.args, **kwargs: P.kwargs) -> T:
+        if (task := self._tasks.get(key)) is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            task.add_done_callback(functools.partial(self._forget, key))
+            self._tasks[key] = task
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+                if not task.done():
+                    if self._tasks.get(key) is task:
+                        del self._tasks[key]
+                    task.cancel()
+
 class AuthorOnlyView(discord.ui.View):
 
     def __init__(self, author: discord.User, *, timeout: Optional[float] = None):
@@ -91,80 +118,123 @@ class PaginatorView(AuthorOnlyView):
 
     def _update_sign(self) -> None:
         self.children[2].label = f'Page {self.counter + 1}'
+        # the last page can only be jumped to once the source knows where it is
+        self.children[4].disabled = self.paginator.source.total is None
+
+    async def _show(self, interaction: discord.Interaction, index: int) -> None:
+        if (page := await self.paginator.source.get(index)) is None:
+            return
+
+        self.counter = index
+        self._update_sign()
+        return await interaction.message.edit(embed=page, view=self)
 
     @discord.ui.button(
         emoji=bot.emojis['REWIND'],
         style=discord.ButtonStyle.gray,
     )
-    async def rewind(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
-        self.counter = 0
-        self._update_sign()
-        return await interaction.message.edit(embed=self.paginator.entries[0], view=self)
+    async def rewind(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        return await self._show(interaction, 0)
 
     @discord.ui.button(
         label=bot.emojis['ARROW_LEFT'],
         style=discord.ButtonStyle.gray,
     )
-    async def arrow_left(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
-        try:
-            if self.counter == 0:
-                return
-            self.counter -= 1
-            self._update_sign()
-            return await interaction.message.edit(embed=self.paginator.entries[self.counter], view=self)
-        except IndexError:
+    async def arrow_left(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        if self.counter == 0:
             return
+        return await self._show(interaction, self.counter - 1)
 
     @discord.ui.button(
         label='Page 1',
         disabled=True,
         style=discord.ButtonStyle.blurple,
     )
-    async def page_sign(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
+    async def page_sign(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         return
 
     @discord.ui.button(
         label=bot.emojis['ARROW_RIGHT'],
         style=discord.ButtonStyle.gray,
     )
-    async def arrow_right(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
-        try:
-            if self.counter == len(self.paginator.entries):
-                return
-            self.counter += 1
-            self._update_sign()
-            return await interaction.message.edit(embed=self.paginator.entries[self.counter], view=self)
-        except IndexError:
-            return
+    async def arrow_right(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        # past the last page the source has nothing to show, and the counter stays put
+        return await self._show(interaction, self.counter + 1)
 
     @discord.ui.button(
         emoji=bot.emojis['FAST_FW'],
         style=discord.ButtonStyle.gray,
     )
-    async def fast_forward(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
-        self.counter = len(self.paginator.entries) - 1
-        self._update_sign()
-        return await interaction.message.edit(embed=self.paginator.entries[-1], view=self)
+    async def fast_forward(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        if self.paginator.source.total is None:
+            return
+        return await self._show(interaction, self.paginator.source.total - 1)
 
     @discord.ui.button(
         label=bot.emojis['STOP'] + ' stop',
         style=discord.ButtonStyle.red,
     )
-    async def stop_button(self, button: discord.ui.Button, interaction: discord.Interaction) -> None:
+    async def stop_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         for item in self.children:
             if isinstance(item, discord.ui.Button):
                 item.disabled = True
-        await interaction.message.edit(embed=self.paginator.entries[self.counter], view=self)
+        await interaction.message.edit(embed=await self.paginator.source.get(self.counter), view=self)
         return self.stop()
 
+class PageSource:
+    """
+    Produces a paginator's pages on demand.
+
+    `get_page` takes a page index and returns its embed, or None past the last page; it may be a coroutine function.
+    `total` is the number of pages when it is known up front, otherwise it is learned once `get_page` runs out.
+    Only the pages within `keep` of the one last asked for stay cached.
+    """
+
+    def __init__(
+        self,
+        get_page: Callable[[int], Union[Optional[discord.Embed], Awaitable[Optional[discord.Embed]]]],
+        *,
+        total: Optional[int] = None,
+        keep: int = 2,
+    ) -> None:
+        self.get_page = get_page
+        self.total = total
+        self.keep = keep
+
+        self._pages: dict[int, discord.Embed] = {}
+
+    @classmethod
+    def from_list(cls, entries: list[discord.Embed]) -> PageSource:
+        return cls(entries.__getitem__, total=len(entries))
+
+    async def get(self, index: int) -> Optional[discord.Embed]:
+        if index < 0 or (self.total is not None and index >= self.total):
+            return None
+
+        if (page := self._pages.get(index)) is None:
+            page = self.get_page(index)
+            if inspect.isawaitable(page):
+                page = await page
+
+            if page is None:
+                self.total = index
+                return None
+            self._pages[index] = page
+
+        for cached in [i for i in self._pages if abs(i - index) > self.keep]:
+            del self._pages[cached]
+        return page
+
 class Paginator:
 
-    def __init__(self, ctx: AquaContext, entries: list[discord.Embed]) -> None:
+    def __init__(self, ctx: AquaContext, entries: Union[list[discord.Embed], PageSource], *, timeout: Optional[float] = None) -> None:
         self.ctx = ctx
-        self.entries = entries
+        self.source = PageSource.from_list(entries) if isinstance(entries, list) else entries
 
-        self.view = PaginatorView(self.ctx.author, self)
+        self.view = PaginatorView(self.ctx.author, self, timeout=timeout)
 
     async def start(self, *, reply: bool = False, **send_kwargs) -> discord.Message:
         method = self.ctx.reply if reply else self.ctx.send
-        return await method(embed=self.entries[self.view.counter], view=self.view, **send_kwargs)
\ No newline at end of file
+        page = await self.source.get(self.view.counter)
+        self.view._update_sign()
+        return await method(embed=page, view=self.view, **send_kwargs)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, ClassVar, Optional
+import contextlib
+import asyncio
+import random
+import time
+
+import aiohttp
+from yarl import URL
+
+__all__: tuple[str] = (
+    'HostUnavailable',
+    'TokenBucket',
+    'CircuitBreaker',
+    'WebClient',
+)
+
+class HostUnavailable(Exception):
+    pass
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class CircuitBreaker:
+    """
+    Fails fast once a host has failed `threshold` times in a row.
+
+    After `cooldown` seconds a single probe request is let through;
+    its outcome either closes the breaker again or restarts the cooldown.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._failures: int = 0
+        self._opened_at: Optional[float] = None
+        self._probe_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+
+        now = time.monotonic()
+        if now - self._opened_at < self.cooldown:
+            return False
+
+        # half-open: only one probe at a time, a probe that never reported back is given up on after a cooldown
+        if self._probe_at is None or now - self._probe_at >= self.cooldown:
+            self._probe_at = now
+            return True
+        return False
+
+    def success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_at = None
+
+    def failure(self) -> None:
+        self._failures += 1
+        self._probe_at = None
+
+        if self._failures >= self.threshold:
+            self._opened_at = time.monotonic()
+
+class WebClient:
+    """
+    The bot's shared HTTP client.
+
+    Wraps one `aiohttp.ClientSession` with a tuned connection pool and timeouts,
+    and gives every upstream host its own rate limit and circuit breaker.
+    Idempotent requests are retried with jittered exponential backoff on timeouts and 5xx responses.
+    """
+
+    RATE_LIMITS: ClassVar[dict[str, tuple[float, float]]] = {
+        'fishbase.se': (2, 5),
+        'www.liveaquaria.com': (2, 5),
+        'aquarium-fish.liveaquaria.com': (2, 5),
+        'mystb.in': (1, 3),
+        'cdn.lambdabot.cf': (2, 5),
+    }
+    DEFAULT_RATE_LIMIT: ClassVar[tuple[float, float]] = (5, 10)
+
+    IDEMPOTENT_METHODS: ClassVar[frozenset[str]] = frozenset({'GET', 'HEAD', 'OPTIONS'})
+    RETRY_STATUSES: ClassVar[frozenset[int]] = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        *,
+        rate_limits: Optional[dict[str, tuple[float, float]]] = None,
+        retries: int = 2,
+        backoff: float = 0.5,
+        timeout: float = 20,
+        limit: int = 100,
+        limit_per_host: int = 8,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limits = {**self.RATE_LIMITS, **(rate_limits or {})}
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+                enable_cleanup_closed=True,
+            ),
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=5, sock_read=timeout / 2),
+        )
+
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if (bucket := self._buckets.get(host)) is None:
+            bucket = self._buckets[host] = TokenBucket(*self.rate_limits.get(host, self.DEFAULT_RATE_LIMIT))
+        return bucket
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        if (breaker := self._breakers.get(host)) is None:
+            breaker = self._breakers[host] = CircuitBreaker()
+        return breaker
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(10, self.backoff * 2 ** attempt))
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, *, retries: Optional[int] = None, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        host = URL(url).host
+        bucket = self._bucket(host)
+        breaker = self._breaker(host)
+
+        if retries is None:
+            retries = self.retries if method.upper() in self.IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise HostUnavailable(f'{host} is currently unavailable, please try again later')
+
+            await bucket.acquire()
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                breaker.failure()
+                if attempt >= retries:
+                    raise
+            else:
+                if response.status >= 500:
+                    breaker.failure()
+                else:
+                    breaker.success()
+
+                if response.status not in self.RETRY_STATUSES or attempt >= retries:
+                    break
+                response.release()
+
+            await asyncio.sleep(self._delay(attempt))
+            attempt += 1
+
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def get(self, url: str, **kwargs: Any) -> contextlib.AbstractAsyncContextManager[aiohttp.ClientResponse]:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> contextlib.AbstractAsyncContextManager[aiohttp.ClientResponse]:
+        return self.request('POST', url, **kwargs)
+
+    async def close(self) -> None:
+        await self.session.close()
@@ -1,7 +1,6 @@
 
 from bot.bot import AquaBot
 
-bot = AquaBot()
-
 if __name__ == '__main__':
+    bot = AquaBot()
     bot.run()
\ No newline at end of file
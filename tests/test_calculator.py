@@ -0,0 +1,44 @@
+import asyncio
+import gc
+import weakref
+from types import SimpleNamespace
+
+import discord
+
+from bot.ext.maths import MathCog
+
+def custom_ids(view: discord.ui.View) -> list[str]:
+    return [item.custom_id for item in view.children]
+
+def test_calculator_messages_are_not_kept_alive():
+    async def main():
+        client = discord.Client(intents=discord.Intents.none())
+        client.color = 0
+        cog = MathCog(client)
+
+        sent = []
+        ids = iter(range(1, 1001))
+
+        async def reply(*, view, **kwargs):
+            # registers the view for the new message, as sending it does
+            message = SimpleNamespace(id=next(ids))
+            client._connection.store_view(view, message.id)
+            sent.append(weakref.ref(view))
+            return message
+
+        ctx = SimpleNamespace(author=SimpleNamespace(id=1), reply=reply)
+        for _ in range(1000):
+            message = await cog.linear.callback(cog, ctx)
+
+        last = sent[-1]()
+        assert last is not cog.calculator and last.is_finished()
+        assert custom_ids(last) == custom_ids(cog.calculator)
+        del last
+
+        gc.collect()
+        assert not any(ref() for ref in sent)
+        assert client.persistent_views == [cog.calculator]
+        assert not cog.calculator.is_finished()
+        assert len(cog.calculations) == 1000
+
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from bot.datasets import SeriesReader
+
+def read(*chunks: bytes):
+    reader = SeriesReader()
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader.close()
+
+@pytest.mark.parametrize('chunks', [
+    (b'\xef\xbb\xbf1,2\n3,4\n',),
+    (b'\xef\xbb', b'\xbf1,2\n3,4',),
+    (b'\xef\xbb\xbfx,y\n1,2\n', b'3,4\n'),
+])
+def test_byte_order_mark(chunks):
+    x, y = read(*chunks)
+    np.testing.assert_array_equal(x, [1, 3])
+    np.testing.assert_array_equal(y, [2, 4])
+
+def test_header_and_text_columns():
+    x, y = read(b'time,x,y\n', b'12:00,1,2\n12:01,3,4\n')
+    np.testing.assert_array_equal(x, [1, 3])
+    np.testing.assert_array_equal(y, [2, 4])
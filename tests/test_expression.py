@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from bot.expression import CONSTANTS, FUNCTIONS, MAX_DEPTH, MAX_LENGTH, InvalidExpression, compile_expression, normalize_expression
+
+X = np.linspace(0.5, 2, 7)
+
+@pytest.mark.parametrize('expression, normalized', [
+    ('2x^2 + 3(x - 1)', '2*x**2+3*(x-1)'),
+    ('2xsin(x)', '2*x*sin(x)'),
+    ('exp(x)', 'exp(x)'),
+    ('2ex', '2*e*x'),
+    ('2e-1', '2*e-1'),
+    ('.5x', '.5*x'),
+    ('log10(x)log2(x)', 'log10(x)*log2(x)'),
+])
+def test_normalize(expression, normalized):
+    assert normalize_expression(expression) == normalized
+
+@pytest.mark.parametrize('name', FUNCTIONS)
+def test_functions(name):
+    np.testing.assert_allclose(compile_expression(f'{name}(x / 4)')(X), FUNCTIONS[name](X / 4))
+
+@pytest.mark.parametrize('name', CONSTANTS)
+def test_constants(name):
+    np.testing.assert_allclose(compile_expression(f'{name}x')(X), CONSTANTS[name] * X)
+
+def test_constant_expression_broadcasts():
+    assert compile_expression('2')(X).shape == X.shape
+
+@pytest.mark.parametrize('expression', [
+    '2.5.5',
+    '1..2',
+    '2e2x',
+    '1e10',
+    '.',
+])
+def test_malformed_numbers(expression):
+    with pytest.raises(InvalidExpression, match='Malformed number'):
+        compile_expression(expression)
+
+@pytest.mark.parametrize('expression', [
+    '__import__("os")',
+    'x.real',
+    'lambda: 1',
+    '[x]',
+    'x if x else 1',
+    'x < 1',
+    'x // 2',
+    'y',
+    'print(x)',
+    'sin(x, x)',
+    'sin',
+    'x;',
+    '2 +',
+])
+def test_rejected(expression):
+    with pytest.raises(InvalidExpression):
+        compile_expression(expression)
+
+def test_length_limit():
+    compile_expression('1' * MAX_LENGTH)
+    with pytest.raises(InvalidExpression, match='too long'):
+        compile_expression('1' * (MAX_LENGTH + 1))
+
+@pytest.mark.parametrize('expression', [
+    '-' * 250 + 'x',
+    '+' * 250 + 'x',
+    '-' * MAX_DEPTH + 'x',
+    '-(' * 40 + '-' * 100 + 'x' + ')' * 40,
+])
+def test_depth_limit(expression):
+    with pytest.raises(InvalidExpression):
+        compile_expression(expression)
+
+def test_depth_within_limit():
+    depth = MAX_DEPTH // 2
+    np.testing.assert_allclose(compile_expression('-' * depth + 'x')(X), X)
+
+@pytest.mark.parametrize('expression', [
+    '(-1)^0.5',
+    'x + (-1)^0.5',
+    '(-2)^(1/3) + x',
+])
+def test_complex_results(expression):
+    with pytest.raises(InvalidExpression, match='complex'):
+        compile_expression(expression)(np.array([1.0, 2.0]))
+
+def test_negative_base_with_x_is_nan():
+    # numpy keeps real arrays real, the points that would be complex are just not drawn
+    assert np.isnan(compile_expression('(-x)^0.5')(np.array([1.0]))).all()